@@ -4,7 +4,7 @@
 """An Azure Devops WorkItem"""
 
 
-from msrest.serialization import Model
+from msrest.serialization import Model, attribute_transformer
 
 from devopsdriver.azdo.timestamp import Timestamp
 from devopsdriver.dataobject import DataObject
@@ -13,20 +13,81 @@ from devopsdriver.dataobject import DataObject
 class AzureObject(DataObject):  # pylint: disable=too-few-public-methods
     """Azure WorkItem"""
 
-    def __init__(self, azure_object: Model):
+    LAZY = False  # default for lazy, True to defer as_dict() for all objects
+
+    def __init__(
+        self,
+        azure_object: Model,
+        fields: list[str] | None = None,
+        lazy: bool | None = None,
+    ):
+        """Wraps an Azure object
+
+        Args:
+            azure_object (Model): The object returned from Azure
+            fields (list[str], optional): Only convert these work item fields.
+                                            Defaults to None (all fields).
+            lazy (bool, optional): Wait to convert azure_object to a dict
+                                    until a field is accessed. Defaults to LAZY.
+        """
         self.raw = azure_object
-        super().__init__(self.raw.as_dict())
+        self._values = {}
+        self.__fields = fields
+        lazy = AzureObject.LAZY if lazy is None else lazy
+        super().__init__(None if lazy else self.__convert())
+
+    @property
+    def data(self) -> dict:
+        """The dict form of raw, converted on first access if lazy"""
+        if self.__data is None:
+            self.__data = self.__convert()
+
+        return self.__data
+
+    @data.setter
+    def data(self, value: dict | None):
+        self.__data = value
+
+    def __convert(self) -> dict:
+        if self.__fields is None:
+            return self.raw.as_dict()
+
+        return self.raw.as_dict(key_transformer=AzureObject.__projection(self.__fields))
+
+    @staticmethod
+    def __projection(fields: list[str]):
+        def transformer(attribute: str, description: dict, value: any) -> tuple:
+            if attribute == "fields" and isinstance(value, dict):
+                value = {f: value[f] for f in fields if f in value}
+
+            return attribute_transformer(attribute, description, value)
+
+        return transformer
 
     def _parse_value(self, data):
-        if isinstance(data, str) and Timestamp.is_timestamp(data):
-            return Timestamp(data)
+        if isinstance(data, str):
+            stamp = Timestamp.parse(data)
+
+            if stamp is not None:
+                return stamp
 
         return super()._parse_value(data)
 
     def _get_field(self, name: str, data: dict):
-        value = super()._get_field(name, data)
+        field = self._find_field(name, data)
+        value = None if field is None else self.__value(data, field)
 
         if value is None and "fields" in data:
             return self._get_field(name, data["fields"])
 
         return value
+
+    def __value(self, data: dict, field: str) -> any:
+        """parse a value once, Azure objects are snapshots so it never changes"""
+        # the field index holds a reference to the original dict, so the id is stable
+        key = (id(DataObject._original(data)), field)
+
+        if key not in self._values:
+            self._values[key] = self._parse_value(data[field])
+
+        return self._values[key]
@@ -2,73 +2,243 @@
 
 """Azure Build"""
 
+from codecs import getincrementaldecoder
+from collections.abc import Iterator
+
 from azure.devops.v7_1.build.models import Build as AzureBuild
 from azure.devops.v7_1.build import BuildClient
 from azure.devops.v7_1.build.models import TimelineRecord
 
 from devopsdriver.azdo import AzureObject
+from devopsdriver.azdo.logcache import LogCache
+from devopsdriver.azdo.parallel import ordered_map
+from devopsdriver.azdo.retry import call as call_with_retry
 
 
 class Build(AzureObject):  # pylint: disable=too-few-public-methods
     """Azure Build"""
 
-    def __init__(self, client: BuildClient, build: AzureBuild):
+    WORKERS = 8  # default number of concurrent log downloads
+
+    def __init__(
+        self, client: BuildClient, build: AzureBuild, cache: LogCache | None = None
+    ):
+        """Wrap an Azure build
+
+        Args:
+            client (BuildClient): The azure build client
+            build (AzureBuild): The build
+            cache (LogCache, optional): Where to keep the logs of completed builds.
+                                        Defaults to None (always download).
+        """
         self.client = client
         self.build = build
+        self.cache = cache
         super().__init__(build)
 
     class Step(AzureObject):  # pylint: disable=too-few-public-methods
         """Azure Build Step (job, task, step)"""
 
-        def __init__(self, entry: TimelineRecord):
+        def __init__(self, entry: TimelineRecord, build: "Build | None" = None):
+            """A step in the build timeline
+
+            Args:
+                entry (TimelineRecord): The record from the build timeline
+                build (Build, optional): The build to download the log from.
+                                            Defaults to None (no log).
+            """
             self.children = []
-            self.log_contents: str = None
+            self.__build = build
+            self.__contents = None
             super().__init__(entry)
 
+        @property
+        def log_contents(self) -> str | None:
+            """The whole log, downloaded the first time it is accessed"""
+            if self.__contents is None and self.__build is not None and self.log:
+                self.__contents = "\n".join(self.lines())
+
+            return self.__contents
+
+        @log_contents.setter
+        def log_contents(self, value: str | None):
+            self.__contents = value
+
+        def lines(
+            self, start_line: int | None = None, end_line: int | None = None
+        ) -> Iterator[str]:
+            """Download lines of the log, without keeping them
+
+            Args:
+                start_line (int, optional): The first line. Defaults to None (start).
+                end_line (int, optional): The last line. Defaults to None (end).
+
+            Yields:
+                str: Each line of the log
+            """
+            if self.__build is None or not self.log:
+                return
+
+            yield from self.__build.stream_lines(self.log.id, start_line, end_line)
+
         def all_logs(self) -> list[str]:
             """Get a list of all logs in chronological order
 
             Returns:
                 list[str]: List of all the logs
             """
-            logs = [] if self.log_contents is None else [self.log_contents]
+            logs = []
+            pending = [self]
 
-            for child in self.children:
-                logs.extend(child.all_logs())
+            while pending:  # no recursion, timelines can be very deep
+                step = pending.pop()
+
+                if step.log_contents is not None:
+                    logs.append(step.log_contents)
+
+                pending.extend(reversed(step.children))
 
             return logs
 
-    def __add_steps_and_logs(self, entry: Step, to_process: list[Step]) -> Step:
-        project = self.build.project.name
-        build_id = self.build.id
+    @staticmethod
+    def __order(step: Step) -> tuple:
+        """sort key for steps with the same parent, missing values last"""
+        return (
+            step.order is None,
+            step.order or 0,
+            step.start_time is None,
+            step.start_time,
+        )
+
+    @staticmethod
+    def __add_steps(steps: list[Step]) -> None:
+        """Set the children of every step, ordered by order then start_time"""
+        children = {}
+
+        for step in steps:
+            children.setdefault(step.parent_id, []).append(step)
+
+        for step in steps:
+            step.children = sorted(children.get(step.id, []), key=Build.__order)
+
+    def log_lines(
+        self, log_id: int, start_line: int | None = None, end_line: int | None = None
+    ) -> list[str]:
+        """Download the lines of a log
+
+        If the build is completed and there is a cache, whole logs are cached
+            and ranges of lines are read from cached logs.
+
+        Args:
+            log_id (int): The id of the log
+            start_line (int, optional): The first line (1 is the first line of the
+                                        log). Defaults to None (start).
+            end_line (int, optional): The last line. Defaults to None (end).
 
-        if entry.log:
-            entry.log_contents = "\n".join(
-                self.client.get_build_log_lines(project, build_id, entry.log.id)
-            )
+        Returns:
+            list[str]: The lines of the log
+        """
+        cache = self.cache if self.status == "completed" else None
+        key = LogCache.key(self.build.project.name, self.build.id, log_id)
+        cached = None if cache is None else cache.get(key)
+
+        if cached is not None:
+            return (cached.split("\n") if cached else [])[
+                (start_line or 1) - 1 : end_line
+            ]
+
+        whole = start_line is None and end_line is None
+        lines = {} if start_line is None else {"start_line": start_line}
+
+        if end_line is not None:
+            lines["end_line"] = end_line
+
+        found = call_with_retry(
+            self.client.get_build_log_lines,
+            self.build.project.name,
+            self.build.id,
+            log_id,
+            **lines,
+        )
+
+        if cache is not None and whole:
+            cache.put(key, "\n".join(found))
+
+        return found
+
+    def stream_lines(
+        self, log_id: int, start_line: int | None = None, end_line: int | None = None
+    ) -> Iterator[str]:
+        """Download the lines of a log as they arrive, without keeping the log
+
+        If the build is completed and there is a cache, the lines come from
+            log_lines() so the whole log can be cached.
+
+        Args:
+            log_id (int): The id of the log
+            start_line (int, optional): The first line (1 is the first line of the
+                                        log). Defaults to None (start).
+            end_line (int, optional): The last line. Defaults to None (end).
+
+        Yields:
+            str: Each line of the log
+        """
+        if self.cache is not None and self.status == "completed":
+            yield from self.log_lines(log_id, start_line, end_line)
+            return
 
-        entry.children = [e for e in to_process if e.parent_id == entry.id]
+        lines = {} if start_line is None else {"start_line": start_line}
 
-        for child in entry.children:
-            to_process.remove(child)
-            self.__add_steps_and_logs(child, to_process)
+        if end_line is not None:
+            lines["end_line"] = end_line
 
-        return entry
+        chunks = call_with_retry(
+            self.client.get_build_log,
+            self.build.project.name,
+            self.build.id,
+            log_id,
+            **lines,
+        )
+        decoder = getincrementaldecoder("utf-8")(errors="replace")
+        partial = ""
 
-    def get_logs(self) -> Step:
+        for chunk in chunks:
+            *complete, partial = (partial + decoder.decode(chunk)).split("\n")
+            yield from (l.removesuffix("\r") for l in complete)
+
+        partial += decoder.decode(b"", final=True)
+
+        if partial:
+            yield partial.removesuffix("\r")
+
+    def get_logs(self, workers: int = WORKERS, prefetch: bool = True) -> Step:
         """Gets the logs in a hierarchical structure
 
+        Args:
+            workers (int, optional): Concurrent log downloads. Defaults to WORKERS.
+            prefetch (bool, optional): Download every log concurrently before
+                                        the hierarchy is built. False to download
+                                        each log when it is accessed.
+                                        Defaults to True.
+
         Returns:
             Step: The root element of the log hierarchy
         """
         project = self.build.project.name
         build_id = self.build.id
         steps = [
-            Build.Step(r)
+            Build.Step(r, self)
             for r in self.client.get_build_timeline(project, build_id).records
         ]
+        logged = [s for s in steps if s.log] if prefetch else []
+
+        for step, contents in zip(
+            logged,
+            ordered_map(lambda s: "\n".join(self.log_lines(s.log.id)), logged, workers),
+        ):
+            step.log_contents = contents
+
         root = [s for s in steps if not s.parent_id]
         assert len(root) == 1, root
-        root = root[0]
-        steps.remove(root)
-        return self.__add_steps_and_logs(root, steps)
+        Build.__add_steps(steps)
+        return root[0]
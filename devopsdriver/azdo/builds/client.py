@@ -4,17 +4,152 @@
 """Azure Build Client"""
 
 
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import partial
+
 from azure.devops.v7_1.build import BuildClient
 
+from devopsdriver.azdo.logcache import LogCache
+from devopsdriver.azdo.parallel import ordered_map
+from devopsdriver.azdo.retry import watch
+
 from .build import Build
 
 
 class Client:  # pylint: disable=too-few-public-methods
     """The Build client"""
 
-    def __init__(self, client: BuildClient):
-        self.client = client
+    def __init__(self, client: BuildClient, cache: LogCache | None = None):
+        """Wrap a build client
+
+        Args:
+            client (BuildClient): The azure build client
+            cache (LogCache, optional): Where to keep the logs of completed builds.
+                                        Defaults to None (always download).
+        """
+        self.client = watch(client)
+        self.cache = cache
+
+    WORKERS = 8  # default number of time windows fetched concurrently
+    LOCATION = "0cd358e1-9217-4d94-8269-1c1ee6f93dcf"  # the get_builds api
+    VERSION = "7.1-preview.7"  # the get_builds api version
+    TOKEN = "x-ms-continuationtoken"  # the response header with the next page
+    PARAMETERS = {  # get_builds argument to query parameter and type
+        "definitions": ("definitions", "str"),
+        "min_time": ("minTime", "iso-8601"),
+        "max_time": ("maxTime", "iso-8601"),
+        "status_filter": ("statusFilter", "str"),
+        "result_filter": ("resultFilter", "str"),
+        "properties": ("properties", "str"),
+        "branch_name": ("branchName", "str"),
+        "continuation_token": ("continuationToken", "str"),
+    }
+
+    def pages(  # pylint: disable=too-many-positional-arguments,too-many-arguments
+        self,
+        project: str,
+        pipelines: list[int] = None,
+        start: datetime = None,
+        end: datetime = None,
+        status: str = None,
+        result: str = None,
+        properties: list[str] = None,
+        branch: str = None,
+        prefetch: bool = False,
+    ) -> Iterator[list[Build]]:
+        """Get the builds a page at a time, following continuation tokens
+
+        Args:
+            project (str): The name of the project
+            pipelines (list[int], optional): List of pipeline ids. Defaults to None.
+            start (datetime, optional): Earliest time. Defaults to None.
+            end (datetime, optional): Latest time. Defaults to None.
+            status (str, optional): The status to get. Defaults to None.
+            result (str, optional): The result to get. Defaults to None.
+            properties (list[str], optional): List or properties to return. Defaults to None.
+            branch (str, optional): The branch to search. Defaults to None.
+            prefetch (bool, optional): Download the next page while the caller
+                                        works on the current one. Defaults to False.
+
+        Yields:
+            list[Build]: Each page of builds that match the given criteria
+        """
+        fetch = partial(
+            self.__page,
+            project,
+            definitions=pipelines,
+            min_time=start,
+            max_time=end,
+            status_filter=status,
+            result_filter=result,
+            properties=properties,
+            branch_name=branch,
+        )
+
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            page, token = fetch(None)
+
+            while True:
+                upcoming = pool.submit(fetch, token) if prefetch and token else None
+                yield page
+
+                if not token:
+                    return
+
+                page, token = fetch(token) if upcoming is None else upcoming.result()
+
+    def __page(self, project: str, token: str | None, **filters) -> tuple:
+        # BuildClient.get_builds drops the continuation token header,
+        # so send the same request it would and keep the header
+        # pylint: disable=protected-access
+        serialize = self.client._serialize
+        filters["continuation_token"] = token
+        response = self.client._send(
+            http_method="GET",
+            location_id=Client.LOCATION,
+            version=Client.VERSION,
+            route_values={"project": serialize.url("project", project, "str")},
+            query_parameters={
+                Client.PARAMETERS[n][0]: serialize.query(
+                    n,
+                    ",".join(str(i) for i in v) if isinstance(v, list) else v,
+                    Client.PARAMETERS[n][1],
+                )
+                for n, v in filters.items()
+                if v is not None
+            },
+        )
+        return (
+            [
+                Build(self.client, b, self.cache)
+                for b in self.client._deserialize(
+                    "[Build]", self.client._unwrap_collection(response)
+                )
+            ],
+            response.headers.get(Client.TOKEN),
+        )
+
+    @staticmethod
+    def windows(
+        start: datetime, end: datetime, count: int
+    ) -> list[tuple[datetime, datetime]]:
+        """Split a time range into equal windows
+
+        Args:
+            start (datetime): The earliest time
+            end (datetime): The latest time
+            count (int): The number of windows
+
+        Returns:
+            list[tuple[datetime, datetime]]: The start and end of each window,
+                                                latest first (like the server
+                                                lists builds)
+        """
+        step = (end - start) / count
+        edges = [start + step * i for i in range(count)] + [end]
+        return [(edges[i], edges[i + 1]) for i in reversed(range(count))]
 
     def list(  # pylint: disable=too-many-positional-arguments,too-many-arguments
         self,
@@ -26,9 +161,14 @@ class Client:  # pylint: disable=too-few-public-methods
         result: str = None,
         properties: list[str] = None,
         branch: str = None,
+        windows: int = 1,
+        workers: int = WORKERS,
     ) -> list[Build]:
         """Get the list of builds
 
+        With start, end and more than one window, each window of time
+            is paged through concurrently.
+
         Args:
             project (str): The name of the project
             pipelines (list[int], optional): List of pipeline ids. Defaults to None.
@@ -38,22 +178,31 @@ class Client:  # pylint: disable=too-few-public-methods
             result (str, optional): The result to get. Defaults to None.
             properties (list[str], optional): List or properties to return. Defaults to None.
             branch (str, optional): The branch to search. Defaults to None.
+            windows (int, optional): The number of time windows. Defaults to 1.
+            workers (int, optional): Windows fetched at once. Defaults to WORKERS.
 
         Returns:
             list[Build]: List of all the builds that match the given criteria
         """
-        continuation = None
-        return [
-            Build(self.client, b)
-            for b in self.client.get_builds(
-                project,
-                continuation_token=continuation,
-                definitions=pipelines,
-                min_time=start,
-                max_time=end,
-                status_filter=status,
-                result_filter=result,
-                properties=properties,
-                branch_name=branch,
-            )
-        ]
+        spans = (
+            Client.windows(start, end, windows)
+            if windows > 1 and start is not None and end is not None
+            else [(start, end)]
+        )
+        found = {}  # builds on the edge of two windows are listed by both
+
+        for builds in ordered_map(
+            lambda s: [
+                b
+                for p in self.pages(
+                    project, pipelines, s[0], s[1], status, result, properties, branch
+                )
+                for b in p
+            ],
+            spans,
+            workers,
+        ):
+            for build in builds:
+                found.setdefault(build.data.get("id", id(build)), build)
+
+        return list(found.values())
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+
+
+"""Build and pipeline logs stored locally
+
+Logs of completed builds and runs never change, so they only need to be downloaded once.
+Logs are compressed and the least recently used are removed
+    when the cache grows past its size limit.
+"""
+
+
+from sqlite3 import connect
+from threading import Lock
+from time import time
+from zlib import compress, decompress
+
+
+class LogCache:
+    """Compressed logs in a SQLite database"""
+
+    MAX_BYTES = 512 * 1024 * 1024  # default limit of compressed logs to keep
+
+    def __init__(self, path: str = ":memory:", max_bytes: int = MAX_BYTES):
+        """Open or create a cache
+
+        Args:
+            path (str, optional): The database file. Defaults to ":memory:".
+            max_bytes (int, optional): The most compressed bytes to keep.
+                                        Defaults to MAX_BYTES.
+        """
+        self.max_bytes = max_bytes
+        self.lock = Lock()  # logs are downloaded concurrently
+        self.connection = connect(path, check_same_thread=False)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS logs ("
+            + "key TEXT PRIMARY KEY, size INTEGER, used REAL, data BLOB)"
+        )
+        self.connection.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def close(self) -> None:
+        """Close the database"""
+        self.connection.close()
+
+    @staticmethod
+    def key(*parts: any) -> str:
+        """The cache key for a log
+
+        Args:
+            parts (any): What identifies the log, ie project, build id, log id
+
+        Returns:
+            str: The key
+        """
+        return "|".join(str(p) for p in parts)
+
+    def __len__(self) -> int:
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM logs").fetchone()[0]
+
+    def size(self) -> int:
+        """The number of compressed bytes stored
+
+        Returns:
+            int: The total size of the logs
+        """
+        with self.lock:
+            (total,) = self.connection.execute("SELECT SUM(size) FROM logs").fetchone()
+
+        return total or 0
+
+    def get(self, key: str) -> str | None:
+        """Get a cached log
+
+        Args:
+            key (str): From key()
+
+        Returns:
+            str | None: The log or None if it is not cached
+        """
+        with self.lock:
+            found = self.connection.execute(
+                "SELECT data FROM logs WHERE key = ?", (key,)
+            ).fetchone()
+
+            if found is None:
+                return None
+
+            self.connection.execute(
+                "UPDATE logs SET used = ? WHERE key = ?", (time(), key)
+            )
+            self.connection.commit()
+
+        return decompress(found[0]).decode("utf-8")
+
+    def put(self, key: str, text: str) -> None:
+        """Cache a log, removing the least recently used if over max_bytes
+
+        Args:
+            key (str): From key()
+            text (str): The log
+        """
+        data = compress(text.encode("utf-8"))
+
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO logs VALUES (?, ?, ?, ?)",
+                (key, len(data), time(), data),
+            )
+            self.__evict()
+            self.connection.commit()
+
+    def __evict(self) -> None:
+        (total,) = self.connection.execute("SELECT SUM(size) FROM logs").fetchone()
+        evicted = []
+
+        for key, size in self.connection.execute(
+            "SELECT key, size FROM logs ORDER BY used"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+
+            evicted.append((key,))
+            total -= size
+
+        self.connection.executemany("DELETE FROM logs WHERE key = ?", evicted)
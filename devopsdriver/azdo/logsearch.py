@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+
+
+"""Search build and pipeline logs for known error signatures
+
+All the patterns are combined into one regular expression
+    so most lines are rejected with a single search.
+Only lines that match are checked against each pattern to find which ones matched.
+Logs are scanned as they are downloaded and only the locations of matches are kept.
+"""
+
+
+from collections.abc import Iterable, Iterator
+from re import compile as compile_pattern, error as PatternError, search
+
+from devopsdriver.azdo.builds.build import Build
+from devopsdriver.azdo.logcache import LogCache
+from devopsdriver.azdo.parallel import ordered_map
+from devopsdriver.azdo.pipeline.run import Run
+
+
+class LogMatch:  # pylint: disable=too-few-public-methods
+    """Where a pattern was found, without the text of the log"""
+
+    __slots__ = ("pattern", "path", "line")
+
+    def __init__(self, pattern: str, path: tuple[str, ...], line: int):
+        self.pattern = pattern  # the name of the pattern
+        self.path = path  # build step names from the root, or the run log id
+        self.line = line  # the line in the log, the first line is 1
+
+    def __repr__(self) -> str:
+        return f"{self.pattern}@{'/'.join(self.path)}:{self.line}"
+
+
+class LogSearch:
+    """Search logs for several patterns at once"""
+
+    WORKERS = 8  # default number of builds or runs searched concurrently
+    REFERENCES = r"\\\d|\(\?P="  # group references are not safe to combine
+
+    def __init__(self, patterns: dict[str, str] | list[str], flags: int = 0):
+        """Compile the patterns
+
+        Args:
+            patterns (dict[str, str] | list[str]): name to regular expression,
+                                                    or regular expressions
+                                                    (named by themselves)
+            flags (int, optional): re flags for every pattern. Defaults to 0.
+        """
+        named = patterns if isinstance(patterns, dict) else {p: p for p in patterns}
+        self.patterns = [(n, compile_pattern(p, flags)) for n, p in named.items()]
+        self.any = None  # None means check each pattern on every line
+
+        if not any(search(LogSearch.REFERENCES, p) for p in named.values()):
+            try:
+                self.any = compile_pattern(
+                    "|".join(f"(?:{p})" for p in named.values()), flags
+                )
+
+            except PatternError:  # ie the same group name in two patterns
+                pass
+
+    def lines(self, lines: Iterable[str]) -> Iterator[tuple[str, int]]:
+        """Find the patterns in lines of text
+
+        Args:
+            lines (Iterable[str]): The lines to search
+
+        Yields:
+            tuple[str, int]: The name of the pattern and the line number (from 1)
+        """
+        for number, line in enumerate(lines, start=1):
+            if self.any is not None and not self.any.search(line):
+                continue
+
+            for name, pattern in self.patterns:
+                if pattern.search(line):
+                    yield name, number
+
+    def search_build(self, build: Build) -> list[LogMatch]:
+        """Search the logs of every step of a build, one log at a time
+
+        Args:
+            build (Build): The build
+
+        Returns:
+            list[LogMatch]: The matches in chronological order
+        """
+        root = build.get_logs(prefetch=False)
+        found = []
+        pending = [(root, (LogSearch.__name(root),))]
+
+        while pending:
+            step, path = pending.pop()
+            found.extend(LogMatch(n, path, l) for n, l in self.lines(step.lines()))
+            pending.extend(
+                (c, path + (LogSearch.__name(c),)) for c in reversed(step.children)
+            )
+
+        return found
+
+    @staticmethod
+    def __name(step: Build.Step) -> str:
+        return step.data.get("name") or str(step.data.get("id"))
+
+    def search_run(self, run: Run, cache: LogCache | None = None) -> list[LogMatch]:
+        """Search the logs of a pipeline run, one log at a time
+
+        Args:
+            run (Run): The pipeline run
+            cache (LogCache, optional): Where to keep the logs of a completed run.
+                                        Defaults to None (always download).
+
+        Returns:
+            list[LogMatch]: The matches in the order of the logs
+        """
+        found = []
+
+        for log in run.iter_logs(cache):
+            found.extend(
+                LogMatch(n, (str(log.id),), l)
+                for n, l in self.lines(log.text.split("\n"))
+            )
+
+        return found
+
+    def search(
+        self,
+        sources: Iterable[Build | Run],
+        workers: int = WORKERS,
+        cache: LogCache | None = None,
+    ) -> Iterator[tuple[Build | Run, list[LogMatch]]]:
+        """Search many builds and runs concurrently
+
+        Args:
+            sources (Iterable[Build | Run]): The builds and runs to search
+            workers (int, optional): Concurrent searches. Defaults to WORKERS.
+            cache (LogCache, optional): Where to keep the logs of completed runs
+                                        (builds use their own cache).
+                                        Defaults to None.
+
+        Yields:
+            tuple[Build | Run, list[LogMatch]]: Each source and its matches,
+                                                in the order of sources
+        """
+        sources = list(sources)
+        yield from zip(
+            sources,
+            ordered_map(
+                lambda s: (
+                    self.search_run(s, cache)
+                    if isinstance(s, Run)
+                    else self.search_build(s)
+                ),
+                sources,
+                workers,
+            ),
+        )
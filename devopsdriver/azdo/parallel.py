@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+
+
+"""Run Azure requests concurrently"""
+
+
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+
+def ordered_map(
+    function: Callable[[any], any], items: Iterable, workers: int = 8
+) -> Iterator[any]:
+    """Like map() but calls are run on a pool of threads
+
+    At most twice the number of workers calls are in flight (or waiting on results)
+    at any time, so items can be a long (or lazy) sequence.
+
+    Args:
+        function (Callable): The function to call with each item
+        items (Iterable): The items to pass to function
+        workers (int, optional): The number of threads. Defaults to 8.
+
+    Yields:
+        any: The results of function, in the same order as items
+    """
+    items = iter(items)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = deque(pool.submit(function, i) for i in islice(items, 2 * workers))
+
+        while pending:
+            result = pending.popleft().result()
+            pending.extend(pool.submit(function, i) for i in islice(items, 1))
+            yield result
@@ -9,6 +9,7 @@ from azure.devops.v7_1.pipelines.models import Log as AzureLog
 from requests import get as get_url
 
 from devopsdriver.azdo.azureobject import AzureObject
+from devopsdriver.azdo.logcache import LogCache
 
 
 GET_URL = get_url  # pylint: disable=invalid-name
@@ -23,6 +24,21 @@ class Log(AzureObject):  # pylint: disable=too-few-public-methods
     url ("https://dev.azure.com/Org/<guid>/_apis/pipelines/1/runs/10/logs/8")
     """
 
-    def __init__(self, log: AzureLog):
-        self.text = GET_URL(log.signed_content.url, timeout=1).text
+    def __init__(self, log: AzureLog, cache: LogCache | None = None):
+        """Download a log
+
+        Args:
+            log (AzureLog): The log, with signed content
+            cache (LogCache, optional): Where to keep the log, only pass a cache if
+                                        the run is completed. Defaults to None.
+        """
+        self.text = None if cache is None else cache.get(LogCache.key(log.url))
+
+        if self.text is None:
+            response = GET_URL(log.signed_content.url, timeout=1)
+            self.text = response.text
+
+            if cache is not None and response.ok:  # not an error, ie an expired url
+                cache.put(LogCache.key(log.url), self.text)
+
         super().__init__(log)
@@ -4,11 +4,14 @@
 """Pipeline Run"""
 
 
+from collections.abc import Iterator
+
 from azure.devops.v7_1.pipelines.models import Pipeline
 from azure.devops.v7_1.pipelines.models import Run as AzureRun
 from azure.devops.v7_1.pipelines import PipelinesClient
 
 from devopsdriver.azdo import AzureObject
+from devopsdriver.azdo.logcache import LogCache
 
 from .log import Log
 
@@ -35,11 +38,28 @@ class Run(AzureObject):  # pylint: disable=too-few-public-methods
         self.pipeline = pipeline
         super().__init__(run)
 
-    def get_logs(self):
-        """Get Logs for the run"""
-        return [
-            Log(l)
-            for l in self.client.list_logs(
-                self.project, self.pipeline.id, self.raw.id, expand="signedContent"
-            ).logs
-        ]
+    def iter_logs(self, cache: LogCache | None = None) -> Iterator[Log]:
+        """Download the logs for the run one at a time
+
+        Args:
+            cache (LogCache, optional): Where to keep the logs of a completed run.
+                                        Defaults to None (always download).
+
+        Yields:
+            Log: Each log of the run
+        """
+        cache = cache if self.state == "completed" else None
+
+        for log in self.client.list_logs(
+            self.project, self.pipeline.id, self.raw.id, expand="signedContent"
+        ).logs:
+            yield Log(log, cache)
+
+    def get_logs(self, cache: LogCache | None = None) -> list[Log]:
+        """Get Logs for the run
+
+        Args:
+            cache (LogCache, optional): Where to keep the logs of a completed run.
+                                        Defaults to None (always download).
+        """
+        return list(self.iter_logs(cache))
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+
+
+"""Retry Azure requests that were throttled
+
+msrest already retries 5xx responses (honoring Retry-After),
+    but not 429 Too Many Requests.
+The SDK errors do not carry the response (and the message of a JSON error
+    does not include the status code), so watch() adds a response hook
+    to a SDK client that keeps the status code and Retry-After header.
+"""
+
+
+from collections.abc import Callable
+from re import compile as regex
+from threading import local
+from time import sleep
+
+from msrest.exceptions import ClientException
+
+SLEEP = sleep  # pylint: disable=invalid-name
+RETRY_STATUS = {429}  # Too Many Requests
+STATUS_PATTERN = regex(r"Operation returned a (\d+) status code")
+LAST = local()  # status and retry_after of the last response on this thread
+
+
+def remember(response: any, *_, **__) -> None:
+    """A requests response hook that keeps the status and Retry-After
+
+    Requests are sent on the thread that raises the error, so they
+        are kept per thread.
+
+    Args:
+        response (requests.Response): The response
+    """
+    LAST.status = response.status_code
+    LAST.retry_after = (
+        response.headers.get("Retry-After")
+        if response.status_code in RETRY_STATUS
+        else None
+    )
+
+
+def watch(client: any) -> any:
+    """Keep the status and Retry-After header of the responses a SDK client receives
+
+    Args:
+        client (any): The azure client, anything without a config is ignored
+
+    Returns:
+        any: client
+    """
+    hooks = getattr(getattr(client, "config", None), "hooks", None)
+
+    if hooks is not None and remember not in hooks:
+        hooks.append(remember)
+
+    return client
+
+
+def status_code(error: Exception) -> int | None:
+    """Find the HTTP status code of a failed request
+
+    Args:
+        error (Exception): The exception raised by the request,
+                            if the status is not in it the status remembered
+                            for this thread (see watch()) is used
+
+    Returns:
+        int | None: The status code or None if it is not known
+    """
+    response = getattr(error, "response", None)
+
+    if getattr(response, "status_code", None) is not None:
+        return response.status_code
+
+    found = STATUS_PATTERN.search(str(error))
+    return int(found.group(1)) if found else getattr(LAST, "status", None)
+
+
+def retry_after(error: Exception) -> float | None:
+    """Find the number of seconds the server asked us to wait
+
+    Args:
+        error (Exception): The exception raised by the request,
+                            if it has no response the header remembered
+                            for this thread (see watch()) is used
+
+    Returns:
+        float | None: The seconds from the Retry-After header or None
+    """
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    value = (
+        getattr(LAST, "retry_after", None)
+        if headers is None
+        else headers.get("Retry-After")
+    )
+
+    try:
+        return float(value)
+
+    except (TypeError, ValueError):
+        return None
+
+
+def call(
+    function: Callable[..., any],
+    *args,
+    retries: int = 5,
+    backoff: float = 1.0,
+    **kwargs,
+) -> any:
+    """Call function, retrying on 429 responses
+
+    Waits for Retry-After seconds if the server sent it (see watch()),
+        otherwise backoff doubled for every attempt.
+
+    Args:
+        function (Callable): The request to make
+        args (list): The arguments to the function
+        retries (int, optional): The maximum number of retries. Defaults to 5.
+        backoff (float, optional): The first delay in seconds. Defaults to 1.0.
+        kwargs (dict): The keyword arguments to the function
+
+    Returns:
+        any: The result of function
+    """
+    for attempt in range(retries):
+        LAST.status = LAST.retry_after = None
+
+        try:
+            return function(*args, **kwargs)
+
+        except ClientException as error:
+            if status_code(error) not in RETRY_STATUS:
+                raise
+
+            delay = retry_after(error)
+            SLEEP(backoff * 2**attempt if delay is None else delay)
+
+    return function(*args, **kwargs)
@@ -4,17 +4,26 @@
 """Tools that help when working with Azure"""
 
 
-from datetime import datetime, timezone, timedelta
+from datetime import date, datetime, timezone, timedelta
 from functools import total_ordering
 
 
 @total_ordering
 class Timestamp:
-    """An Azure timestamp"""
+    """An Azure timestamp
 
+    Stored as an integer number of microseconds since the epoch,
+        the datetime is only created when it is needed.
+    """
+
+    __slots__ = ("_microseconds", "_value")
     DATE_FORMAT = "%Y-%m-%dT%H:%M:%S"
     US_PER_MS = 1000  # microseconds per millisecond
     US_PER_SEC = 1000 * US_PER_MS  # microseconds per second
+    SEPARATORS = str.maketrans("", "", "-T:")  # removes separators from timestamps
+    EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+    EPOCH_DAY = EPOCH.toordinal()
+    ONE_US = timedelta(microseconds=1)
 
     @staticmethod
     def is_timestamp(value: any) -> bool:
@@ -26,18 +35,49 @@ class Timestamp:
         Returns:
             bool: True if the value is an Azure timestamp
         """
-        if not isinstance(value, str):
-            return False
+        return Timestamp.__parse_string(value) is not None
 
-        if not value.endswith("Z"):
-            return False
+    @staticmethod
+    def parse(value: any):
+        """Validates and parses a timestamp string in one pass
 
-        try:
-            Timestamp.__parse_string(value)
-            return True
+        Args:
+            value (any): The value to parse, ie "2023-11-16T03:24:40.36Z"
 
-        except ValueError:
-            return False
+        Returns:
+            Timestamp | None: The timestamp or None if value is not an Azure timestamp
+        """
+        parsed = Timestamp.__parse_string(value)
+        return None if parsed is None else Timestamp.from_microseconds(parsed)
+
+    @staticmethod
+    def parse_many(values: list[any]) -> list:
+        """Parses a list of timestamp strings
+
+        Args:
+            values (list[any]): The values to parse
+
+        Returns:
+            list[Timestamp | None]: The timestamp, or None, for each value
+        """
+        parse = Timestamp.__parse_string
+        create = Timestamp.from_microseconds
+        return [None if p is None else create(p) for p in map(parse, values)]
+
+    @staticmethod
+    def from_microseconds(microseconds: int):
+        """Create a timestamp from microseconds since the epoch
+
+        Args:
+            microseconds (int): Microseconds since 1970-01-01T00:00:00Z
+
+        Returns:
+            Timestamp: The timestamp
+        """
+        stamp = Timestamp.__new__(Timestamp)  # skip __init__ type checks
+        stamp._microseconds = microseconds  # pylint: disable=protected-access
+        stamp._value = None  # pylint: disable=protected-access
+        return stamp
 
     @staticmethod
     def now():
@@ -45,19 +85,41 @@ class Timestamp:
         return Timestamp(datetime.now(tz=timezone.utc))
 
     def __init__(self, value: datetime | str | float | int):
+        self._value = None
+
         if isinstance(value, datetime):
-            self.value = value
+            self._value = value  # keep the original, it may not be UTC
+            self._microseconds = (
+                value.astimezone(timezone.utc) - Timestamp.EPOCH
+            ) // Timestamp.ONE_US
 
         elif isinstance(value, str):
-            self.value = Timestamp.__parse_string(value)
+            self._microseconds = Timestamp.__parse_string(value)
+
+            if self._microseconds is None:
+                raise ValueError(f"Not an Azure timestamp: {value}")
 
         elif isinstance(value, (int, float)):
-            self.value = datetime.fromtimestamp(value, tz=timezone.utc)
+            self._microseconds = round(value * Timestamp.US_PER_SEC)
+
+        else:
+            raise TypeError(f"Cannot create a Timestamp from {type(value)}")
+
+    @property
+    def value(self) -> datetime:
+        """The timestamp as a datetime"""
+        if self._value is None:
+            self._value = Timestamp.EPOCH + timedelta(microseconds=self._microseconds)
+
+        return self._value
 
     def __str__(self) -> str:
         return self.to_string()
 
     def __lt__(self, other) -> bool:
+        if other.__class__ is Timestamp:
+            return self._microseconds < other._microseconds
+
         match Timestamp.__comparison_type(other):
             case 1:
                 return self.value < other.value
@@ -67,6 +129,9 @@ class Timestamp:
                 return NotImplemented
 
     def __eq__(self, other) -> bool:
+        if other.__class__ is Timestamp:
+            return self._microseconds == other._microseconds
+
         match Timestamp.__comparison_type(other):
             case 1:
                 return self.value == other.value
@@ -75,7 +140,16 @@ class Timestamp:
             case _:
                 return NotImplemented
 
+    def __hash__(self) -> int:
+        # the same hash as an equal, timezone aware, datetime
+        return hash(
+            timedelta(days=Timestamp.EPOCH_DAY, microseconds=self._microseconds)
+        )
+
     def __sub__(self, other):
+        if other.__class__ is Timestamp:
+            return timedelta(microseconds=self._microseconds - other._microseconds)
+
         match Timestamp.__comparison_type(other):
             case 1:
                 return self.value - other.value
@@ -88,7 +162,12 @@ class Timestamp:
         if Timestamp.__comparison_type(other) != 3:
             return NotImplemented
 
-        return Timestamp(self.value + other)
+        if self._value is not None:  # keep the timezone (or lack of one)
+            return Timestamp(self._value + other)
+
+        return Timestamp.from_microseconds(
+            self._microseconds + other // Timestamp.ONE_US
+        )
 
     def to_string(self) -> str:
         """Returns the Azure formatted timestamp
@@ -99,7 +178,8 @@ class Timestamp:
         milliseconds = f"{self.value.microsecond / Timestamp.US_PER_MS:03.0f}".rstrip(
             "0"
         )
-        return f"{self.value.strftime(Timestamp.DATE_FORMAT)}.{milliseconds}Z"
+        fraction = f".{milliseconds}" if milliseconds else ""
+        return f"{self.value.strftime(Timestamp.DATE_FORMAT)}{fraction}Z"
 
     def to_timestamp(self) -> float:
         """Converts to a number to use with time.time()
@@ -107,17 +187,63 @@ class Timestamp:
         Returns:
             float: The number of seconds since the epoch
         """
-        return datetime.timestamp(self.value)
+        return self._microseconds / Timestamp.US_PER_SEC
+
+    def to_microseconds(self) -> int:
+        """The number of microseconds since the epoch
+
+        Returns:
+            int: Microseconds since 1970-01-01T00:00:00Z
+        """
+        return self._microseconds
 
     @staticmethod
-    def __parse_string(timestamp: str) -> datetime:
-        assert timestamp.endswith("Z"), timestamp
-        whole, fractional = timestamp.rsplit(".", 1)
-        result = datetime.strptime(whole, Timestamp.DATE_FORMAT)
-        fractional_seconds = float(f"0.{fractional[:-1].ljust(3, '0')}")
-        return result.replace(
-            microsecond=int(fractional_seconds * Timestamp.US_PER_SEC)
-        ).replace(tzinfo=timezone.utc)
+    def __parse_string(timestamp: any) -> int | None:
+        """Parse the fixed layout YYYY-MM-DDTHH:MM:SS.fffZ
+
+        The fraction may have any number of digits, or be left out (with or without
+        the .) for whole seconds.
+
+        Returns:
+            int | None: microseconds since the epoch or None if not a timestamp
+        """
+        if (
+            not isinstance(timestamp, str)
+            or len(timestamp) < 20
+            or timestamp[-1] != "Z"
+            or timestamp[4:19:3] != "--T::"
+            or timestamp[19] != ("Z" if len(timestamp) == 20 else ".")
+        ):
+            return None
+
+        fractional = timestamp[20:-1]
+        digits = timestamp[:19].translate(Timestamp.SEPARATORS) + fractional
+
+        if not digits.isdigit() or not digits.isascii():
+            return None
+
+        if len(digits) != 14 + len(fractional):  # a separator where a digit should be
+            return None
+
+        hours, minutes, seconds = (
+            int(timestamp[11:13]),
+            int(timestamp[14:16]),
+            int(timestamp[17:19]),
+        )
+
+        if hours > 23 or minutes > 59 or seconds > 59:
+            return None
+
+        try:
+            days = date(
+                int(timestamp[0:4]), int(timestamp[5:7]), int(timestamp[8:10])
+            ).toordinal()
+
+        except ValueError:
+            return None
+
+        seconds += ((days - Timestamp.EPOCH_DAY) * 24 + hours) * 3600 + minutes * 60
+        return seconds * Timestamp.US_PER_SEC + int(fractional[:6].ljust(6, "0"))
 
     @staticmethod
     def __comparison_type(other) -> int:
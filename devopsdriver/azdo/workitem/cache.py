@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+
+
+"""WIQL query results stored locally
+
+Results are reused for ttl seconds.
+After that, the results are reused if nothing they depend on has changed
+    since the query ran (checked by the Client with a cheap top 1 query).
+Queries with macros (ie @Today) are always run again after ttl seconds.
+"""
+
+
+from json import dumps, loads
+from re import split
+from sqlite3 import connect
+from threading import Lock
+from time import time
+
+from azure.devops.v7_1.work_item_tracking.models import WorkItemQueryResult
+
+
+TIME = time  # pylint: disable=invalid-name
+
+
+class QueryCache:
+    """WIQL query results in a SQLite database"""
+
+    TTL = 300.0  # seconds to use results without checking for changes
+    MAX_AGE = 24 * 60 * 60.0  # seconds before results are always queried again
+    PROBE_IDS = 1000  # results with more work items than this are not checked
+    QUOTED = r"(\"[^\"]*\"|'[^']*')"  # string constants in WIQL
+
+    def __init__(
+        self, path: str = ":memory:", ttl: float = TTL, max_age: float = MAX_AGE
+    ):
+        """Open or create a cache
+
+        Args:
+            path (str, optional): The database file. Defaults to ":memory:".
+            ttl (float, optional): Seconds before checking for changes.
+                                    Defaults to TTL.
+            max_age (float, optional): Seconds before always querying again.
+                                        Defaults to MAX_AGE.
+        """
+        self.ttl = ttl
+        self.max_age = max_age
+        self.lock = Lock()  # queries run concurrently
+        self.connection = connect(path, check_same_thread=False)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS queries ("
+            + "key TEXT PRIMARY KEY, fetched REAL, checked REAL, data TEXT)"
+        )
+        self.connection.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def close(self) -> None:
+        """Close the database"""
+        self.connection.close()
+
+    @staticmethod
+    def key(query: str, top: int | None, time_precision: bool | None) -> str:
+        """The cache key for a query
+
+        Whitespace and case outside of string constants do not matter.
+
+        Args:
+            query (str): The WIQL query
+            top (int | None): The most results requested
+            time_precision (bool | None): The time precision requested
+
+        Returns:
+            str: The normalized query
+        """
+        parts = split(QueryCache.QUOTED, query)
+        parts[::2] = [" ".join(p.split()).upper() for p in parts[::2]]
+        return f"{''.join(parts).strip()}|{top}|{time_precision}"
+
+    @staticmethod
+    def has_macros(query: str) -> bool:
+        """Does the query use macros, ie @Today or @CurrentIteration
+
+        The items these match change over time without any item changing.
+
+        Args:
+            query (str): The WIQL query
+
+        Returns:
+            bool: True if there is an @ outside of string constants
+        """
+        return any("@" in p for p in split(QueryCache.QUOTED, query)[::2])
+
+    def get(self, key: str) -> tuple[WorkItemQueryResult, bool] | None:
+        """Get cached results
+
+        Args:
+            key (str): From key()
+
+        Returns:
+            tuple[WorkItemQueryResult, bool] | None: The results and True if
+                                                        they are within ttl,
+                                                        None if not cached
+        """
+        with self.lock:
+            found = self.connection.execute(
+                "SELECT fetched, checked, data FROM queries WHERE key = ?", (key,)
+            ).fetchone()
+
+        now = TIME()
+
+        if found is None or now - found[0] > self.max_age:
+            return None
+
+        return (
+            WorkItemQueryResult.deserialize(loads(found[2])),
+            now - found[1] <= self.ttl,
+        )
+
+    def put(self, key: str, result: WorkItemQueryResult) -> None:
+        """Cache results
+
+        Args:
+            key (str): From key()
+            result (WorkItemQueryResult): The results of the query
+        """
+        now = TIME()
+        data = dumps(result.serialize())
+
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO queries VALUES (?, ?, ?, ?)",
+                (key, now, now, data),
+            )
+            self.connection.commit()
+
+    def touch(self, key: str) -> None:
+        """Mark cached results as checked, they are valid for another ttl
+
+        Args:
+            key (str): From key()
+        """
+        with self.lock:
+            self.connection.execute(
+                "UPDATE queries SET checked = ? WHERE key = ?", (TIME(), key)
+            )
+            self.connection.commit()
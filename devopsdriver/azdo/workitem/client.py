@@ -4,19 +4,45 @@
 """Azure WorkItem Client"""
 
 
+from collections.abc import Iterator
+from datetime import timezone
+from itertools import chain
+
 from azure.devops.v7_1.work_item_tracking.models import Wiql as AzureWiql
 from azure.devops.v7_1.work_item_tracking.models import WorkItem as AzureWorkItem
 from azure.devops.v7_1.work_item_tracking.models import TeamContext
+from azure.devops.v7_1.work_item_tracking.models import WorkItemBatchGetRequest
 from azure.devops.v7_1.work_item_tracking.models import WorkItemQueryResult
 from devopsdriver.azdo.azureobject import AzureObject
-from devopsdriver.azdo.workitem.wiql import Wiql
+from devopsdriver.azdo.parallel import ordered_map
+from devopsdriver.azdo.timestamp import Timestamp
+from devopsdriver.azdo.retry import call as call_with_retry, watch
+from devopsdriver.azdo.workitem.cache import QueryCache
+from devopsdriver.azdo.workitem.graph import Graph
+from devopsdriver.azdo.workitem.wiql import Wiql, And, Or, In, NotIn, Group
+from devopsdriver.azdo.workitem.wiql import Ascending, Descending
+from devopsdriver.azdo.workitem.wiql import GreaterThan, GreaterThanOrEqual, LessThan
+from devopsdriver.azdo.workitem.store import RevisionStore
 
 
 class Client:
     """Wraps work item client"""
 
-    def __init__(self, client):
-        self.client = client
+    BATCH_SIZE = 200  # maximum ids per get_work_items_batch request
+    WORKERS = 8  # default number of concurrent requests
+    MAX_RESULTS = 20000  # WIQL queries that match more items than this fail
+    MAX_QUERY_LENGTH = 32000  # WIQL queries longer than this fail
+
+    def __init__(self, client, cache: QueryCache | None = None):
+        """Wrap a work item client
+
+        Args:
+            client (WorkItemTrackingClient): The azure work item client
+            cache (QueryCache, optional): Where to reuse query results.
+                                            Defaults to None (no caching).
+        """
+        self.client = watch(client)
+        self.cache = cache
 
     def query(
         self,
@@ -27,6 +53,8 @@ class Client:
     ) -> WorkItemQueryResult:
         """Perform a wiql query
 
+        If there is a cache, results are reused (except for team queries).
+
         Args:
             wiql (Wiql | str): The query
             team_context (TeamContext, optional): context object. Defaults to None.
@@ -36,6 +64,30 @@ class Client:
         Returns:
             WorkItemQueryResult: The results
         """
+        if self.cache is None or team_context is not None:
+            return self.__query(wiql, team_context, time_precision, top)
+
+        key = QueryCache.key(str(wiql), top, time_precision)
+        cached = self.cache.get(key)
+
+        if cached is not None and cached[1]:
+            return cached[0]
+
+        if cached is not None and not self.__changed(wiql, cached[0]):
+            self.cache.touch(key)
+            return cached[0]
+
+        result = self.__query(wiql, team_context, time_precision, top)
+        self.cache.put(key, result)
+        return result
+
+    def __query(
+        self,
+        wiql: Wiql | str,
+        team_context: TeamContext | None,
+        time_precision: bool | None,
+        top: int | None,
+    ) -> WorkItemQueryResult:
         return self.client.query_by_wiql(
             AzureWiql(query=str(wiql)),
             team_context=team_context,
@@ -43,6 +95,39 @@ class Client:
             top=top,
         )
 
+    def __changed(self, wiql: Wiql | str, result: WorkItemQueryResult) -> bool:
+        """Could the results of wiql be different than result
+
+        Any work item that matches the query, or was in the results,
+            and has changed since the results were returned means yes.
+        Macros, ie @Today, may match different items as time passes.
+
+        Returns:
+            bool: True if the query needs to be run again
+        """
+        ids = [i.id for i in result.work_items or []]
+
+        if (
+            not isinstance(wiql, Wiql)
+            or wiql.source.lower() != "workitems"
+            or QueryCache.has_macros(str(wiql))
+            or result.as_of is None
+            or len(ids) > QueryCache.PROBE_IDS
+        ):
+            return True
+
+        since = result.as_of.astimezone(timezone.utc)
+        changed = GreaterThan(
+            "ChangedDate", since.strftime(f"{Timestamp.DATE_FORMAT}.%fZ")
+        )
+        search = wiql.search
+
+        if search is not None and ids:  # items that no longer match have changed too
+            search = Or(Group(search), In("Id", *ids))
+
+        probe = Wiql().where(And(Group(search), changed) if search else changed)
+        return bool(self.__query(probe, None, True, 1).work_items)
+
     def get_history(  # pylint: disable=too-many-positional-arguments,too-many-arguments
         self,
         wi_id: int,
@@ -54,18 +139,236 @@ class Client:
         """Simple wrapper around get_revisions"""
         return self.client.get_revisions(wi_id, project, top, skip, expand)
 
-    def find_ids(self, wiql: Wiql | str, top: int | None = None) -> list[int]:
+    def __history(
+        self, wi_id: int, project: str | None, retries: int, fields: list[str] | None
+    ) -> list[AzureObject]:
+        return [
+            AzureObject(e, fields)
+            for e in call_with_retry(self.get_history, wi_id, project, retries=retries)
+        ]
+
+    @staticmethod
+    def __selected(wiql: Wiql | str) -> list[str] | None:
+        """The fields selected in wiql, None if only System.Id (the default)"""
+        fields = wiql.fields() if isinstance(wiql, Wiql) else None
+        return None if fields == ["System.Id"] else fields
+
+    def get_histories(
+        self,
+        ids: list[int],
+        project: str | None = None,
+        workers: int = WORKERS,
+        retries: int = 5,
+        fields: list[str] | None = None,
+    ) -> list[list[AzureObject]]:
+        """Gets the history of many work items concurrently
+
+        Requests that are throttled (429) are retried, honoring Retry-After.
+
+        Args:
+            ids (list[int]): The work item ids
+            project (str, optional): Project ID or name. Defaults to None.
+            workers (int, optional): Concurrent requests. Defaults to WORKERS.
+            retries (int, optional): Retries per request. Defaults to 5.
+            fields (list[str], optional): Only convert these fields of each revision.
+                                            Defaults to None (all fields).
+
+        Returns:
+            list[list[AzureObject]]: The history of each item in the same order as ids
+        """
+        return list(
+            ordered_map(
+                lambda i: self.__history(i, project, retries, fields), ids, workers
+            )
+        )
+
+    def get_items(
+        self,
+        ids: list[int],
+        project: str | None = None,
+        fields: list[str] | None = None,
+        expand: str | None = None,
+    ) -> list[AzureObject]:
+        """Gets the current state of work items, BATCH_SIZE ids per request
+
+        Args:
+            ids (list[int]): The work item ids
+            project (str, optional): Project ID or name. Defaults to None.
+            fields (list[str], optional): Fields to return. Defaults to None (all).
+            expand (str, optional): Relations, Fields, Links, All. Defaults to None.
+
+        Returns:
+            list[AzureObject]: The work items in the same order as ids
+                                (items that no longer exist are omitted)
+        """
+        items = []
+
+        for start in range(0, len(ids), Client.BATCH_SIZE):
+            request = WorkItemBatchGetRequest(
+                ids=ids[start : start + Client.BATCH_SIZE],
+                fields=fields,
+                expand=expand,
+                error_policy="omit",
+            )
+            items.extend(
+                AzureObject(w)
+                for w in self.client.get_work_items_batch(request, project)
+                if w is not None
+            )
+
+        return items
+
+    @staticmethod
+    def __narrow(wiql: Wiql, expression) -> Wiql:
+        """wiql with expression ANDed onto the search"""
+        return wiql.where(
+            And(Group(wiql.search), expression) if wiql.search else expression
+        )
+
+    def __id_range(self, wiql: Wiql, start: int, end: int) -> list[int]:
+        return self.find_ids(
+            Client.__narrow(
+                wiql, And(GreaterThanOrEqual("Id", start), LessThan("Id", end))
+            ),
+            Client.MAX_RESULTS,
+        )
+
+    def __partitioned_ids(self, wiql: Wiql, partitions: int, workers: int) -> list[int]:
+        first = self.find_ids(wiql.order_by(Ascending("Id")), 1)
+
+        if not first:
+            return []
+
+        end = self.find_ids(wiql.order_by(Descending("Id")), 1)[0] + 1
+        step = -(-(end - first[0]) // partitions)  # round up
+        ranges = [(s, min(s + step, end)) for s in range(first[0], end, step)]
+        found = {}
+
+        while ranges:
+            results = ordered_map(lambda r: self.__id_range(wiql, *r), ranges, workers)
+            split = []
+
+            for (start, end), ids in zip(ranges, list(results)):
+                if len(ids) < Client.MAX_RESULTS or end - start == 1:
+                    found[start] = ids
+                else:
+                    middle = (start + end) // 2
+                    split.extend([(start, middle), (middle, end)])
+
+            ranges = split
+
+        return list(dict.fromkeys(i for s in sorted(found) for i in found[s]))
+
+    @staticmethod
+    def __chunked(wiql: Wiql) -> tuple[list[Wiql], bool] | None:
+        """Split an IN or NOT IN so each query is shorter than MAX_QUERY_LENGTH
+
+        Returns:
+            tuple[list[Wiql], bool] | None: The queries and True if the results
+                                            are combined (IN) or False if only
+                                            the ids in every result (NOT IN).
+                                            None if the query can be run as is.
+        """
+        query = wiql.select("Id")
+        search = query.search
+
+        while isinstance(search, Group):
+            search = search.expression
+
+        terms = list(search.expressions) if isinstance(search, And) else [search]
+        lists = [n for n, t in enumerate(terms) if isinstance(t, (In, NotIn))]
+
+        if len(str(query)) <= Client.MAX_QUERY_LENGTH or not lists:
+            return None
+
+        index = max(lists, key=lambda n: len(str(terms[n])))
+        clause = terms[index]
+        budget = Client.MAX_QUERY_LENGTH - len(str(query)) + len(str(clause.right))
+        chunks = [[]]
+        length = 2  # parentheses
+
+        for value in clause.values:
+            if chunks[-1] and length + len(str(value)) > budget:
+                chunks.append([])
+                length = 2
+
+            chunks[-1].append(value)
+            length += len(str(value)) + 2  # comma and space
+
+        if len(chunks) == 1:
+            return None
+
+        queries = []
+
+        for chunk in chunks:
+            terms[index] = type(clause)(clause.left, *chunk)
+            queries.append(query.where(And(*terms) if len(terms) > 1 else terms[0]))
+
+        return queries, isinstance(clause, In)
+
+    def __chunked_ids(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self,
+        queries: list[Wiql],
+        union: bool,
+        top: int | None,
+        partitions: int | None,
+        workers: int,
+    ) -> list[int]:
+        results = list(
+            ordered_map(
+                lambda q: self.find_ids(q, top if union else None, partitions, workers),
+                queries,
+                workers,
+            )
+        )
+
+        if union:
+            return list(dict.fromkeys(chain.from_iterable(results)))
+
+        common = set(results[0]).intersection(*results[1:])
+        return [i for i in results[0] if i in common]
+
+    def find_ids(
+        self,
+        wiql: Wiql | str,
+        top: int | None = None,
+        partitions: int | None = None,
+        workers: int = WORKERS,
+    ) -> list[int]:
         """Given a query, find the work item ids
 
+        If partitions is given (and wiql is a Wiql) the query is split into
+            that many [System.Id] ranges which are queried concurrently.
+        Any range that still matches MAX_RESULTS items is split again.
+        The results are in order of [System.Id] range, then the query order.
+
+        If a Wiql is longer than MAX_QUERY_LENGTH because of an IN or NOT IN
+            (the whole search or one of the terms of a top level AND)
+            the values are split into several queries which are run concurrently.
+        IN results are combined in order of the chunks, then the query order.
+
         Args:
             wiql (Wiql | str): The query
             top (int, optional): The number of results to return. Defaults to None.
+            partitions (int, optional): Split the query into this many ranges
+                                        to get past MAX_RESULTS. Defaults to None.
+            workers (int, optional): Concurrent partition queries. Defaults to WORKERS.
 
         Returns:
             list: List of item ids
         """
+        chunks = Client.__chunked(wiql) if isinstance(wiql, Wiql) else None
+
+        if chunks is not None:
+            ids = self.__chunked_ids(*chunks, top, partitions, workers)
+            return ids if top is None else ids[:top]
+
+        if partitions and isinstance(wiql, Wiql):
+            ids = self.__partitioned_ids(wiql, partitions, workers)
+            return ids if top is None else ids[:top]
+
         if isinstance(wiql, Wiql):
-            wiql.select("Id")
+            wiql = wiql.select("Id")
 
         found = self.query(wiql, top=top)
         # top-level items: as_of, columns, query_results_type, query_type, work_items
@@ -75,17 +378,248 @@ class Client:
         # columns: list of name, reference_name, url
         return [i.id for i in found.work_items] if found.work_items else []
 
-    def find(self, wiql: Wiql | str, top: int | None = None) -> list[list[AzureObject]]:
+    def iter_ids(
+        self, wiql: Wiql | str, top: int | None = None, page: int | None = None
+    ) -> Iterator[list[int]]:
+        """Like find_ids() but is not limited to MAX_RESULTS
+
+        If the query matches more than page items,
+            it is run again in pages ordered by [System.Id].
+        Only a Wiql can be paged, query strings are run once.
+
+        Args:
+            wiql (Wiql | str): The query
+            top (int, optional): The number of results to return. Defaults to None.
+            page (int, optional): The most ids per query. Defaults to MAX_RESULTS.
+
+        Yields:
+            list[int]: Pages of item ids
+        """
+        page = Client.MAX_RESULTS if page is None else page
+        remaining = top
+        limit = page if top is None else min(top, page)
+        ids = self.find_ids(wiql, limit)
+
+        if len(ids) < page or limit == top or not isinstance(wiql, Wiql):
+            yield ids
+            return
+
+        last = None
+
+        while remaining is None or remaining > 0:
+            query = wiql.order_by(Ascending("Id"))
+
+            if last is not None:
+                query = Client.__narrow(query, GreaterThan("Id", last))
+
+            limit = page if remaining is None else min(remaining, page)
+            ids = self.find_ids(query, limit)
+            remaining = None if remaining is None else remaining - len(ids)
+
+            if ids:
+                yield ids
+
+            if len(ids) < limit:
+                return
+
+            last = ids[-1]
+
+    def iter_find(
+        self,
+        wiql: Wiql | str,
+        top: int | None = None,
+        project: str | None = None,
+        workers: int = WORKERS,
+        retries: int = 5,
+    ) -> Iterator[list[AzureObject]]:
+        """Like find() but yields each history as it arrives
+
+        Only a few pages of requests are in flight at once,
+            so very large results can be processed in constant memory.
+        If wiql selects fields, only those fields of each revision are converted.
+
+        Args:
+            wiql (Wiql | str): The query
+            top (int, optional): The number of work items to return. Defaults to None.
+            project (str, optional): Project ID or name. Defaults to None.
+            workers (int, optional): Concurrent history requests. Defaults to WORKERS.
+            retries (int, optional): Retries per request. Defaults to 5.
+
+        Yields:
+            list[AzureObject]: The history of each work item
+        """
+        yield from ordered_map(
+            lambda i: self.__history(i, project, retries, Client.__selected(wiql)),
+            chain.from_iterable(self.iter_ids(wiql, top)),
+            workers,
+        )
+
+    def find(
+        self,
+        wiql: Wiql | str,
+        top: int | None = None,
+        history: bool = True,
+        workers: int = WORKERS,
+    ) -> list[list[AzureObject]]:
         """Gets the full history of items found in a WIQL search
 
+        If wiql selects fields, only those fields are fetched (or converted).
+
         Args:
             wiql (Wiql | str): The query
             top (int, optional): The number of work items to return. Defaults to None.
+            history (bool, optional): False to only get the current state of each
+                                        item via batch requests. Defaults to True.
+            workers (int, optional): Concurrent history requests. Defaults to WORKERS.
 
         Returns:
             list[list[WorkItem]]: List of work items, each is a history of work items
+                                    (only the current state if history is False)
         """
-        return [
-            [AzureObject(e) for e in self.get_history(i)]
-            for i in self.find_ids(wiql, top)
+        if not history:
+            return [
+                [i]
+                for i in self.get_items(
+                    self.find_ids(wiql, top), fields=Client.__selected(wiql)
+                )
+            ]
+
+        return list(self.iter_find(wiql, top, workers=workers))
+
+    def get_graph(
+        self,
+        ids: list[int],
+        levels: int | None = None,
+        project: str | None = None,
+        graph: Graph | None = None,
+    ) -> Graph:
+        """Get work items and their descendants, one level at a time
+
+        Each level is fetched with its relations in BATCH_SIZE batches,
+            so a tree costs a few requests per level instead of one per item.
+        Items already in graph with their relations are not fetched again.
+
+        Args:
+            ids (list[int]): The work items at the top of the trees
+            levels (int, optional): Levels of children to get. Defaults to None (all).
+            project (str, optional): Project ID or name. Defaults to None.
+            graph (Graph, optional): Add to this graph. Defaults to None (new graph).
+
+        Returns:
+            Graph: The work items and their parent/child links
+        """
+        graph = Graph() if graph is None else graph
+        level = list(dict.fromkeys(ids))
+        seen = set(level)
+        depth = 0
+
+        while level and (levels is None or depth <= levels):
+            missing = [i for i in level if i not in graph.expanded]
+
+            for item in self.get_items(missing, project, expand="Relations"):
+                graph.add(item)
+
+            graph.expanded.update(missing)  # items without relations or deleted
+            children = (c for i in level for c in graph.children.get(i, []))
+            level = [c for c in dict.fromkeys(children) if c not in seen]
+            seen.update(level)
+            depth += 1
+
+        return graph
+
+    def find_links(
+        self,
+        wiql: Wiql | str,
+        top: int | None = None,
+        project: str | None = None,
+        graph: Graph | None = None,
+    ) -> Graph:
+        """Run a link query (FROM WorkItemLinks) and get the linked work items
+
+        The work items are fetched in BATCH_SIZE batches.
+        Use get_graph(graph.roots(), graph=graph) to get more levels.
+
+        Args:
+            wiql (Wiql | str): The link query, ie MODE (Recursive)
+            top (int, optional): The number of links to return. Defaults to None.
+            project (str, optional): Project ID or name. Defaults to None.
+            graph (Graph, optional): Add to this graph. Defaults to None (new graph).
+
+        Returns:
+            Graph: The work items and their parent/child links
+        """
+        graph = Graph() if graph is None else graph
+        relations = self.query(wiql, top=top).work_item_relations or []
+
+        for relation in relations:
+            graph.link(
+                relation.rel,
+                relation.source.id if relation.source else None,
+                relation.target.id,
+            )
+
+        ids = dict.fromkeys(
+            i
+            for r in relations
+            for i in ([r.source.id] if r.source else []) + [r.target.id]
+            if i not in graph
+        )
+
+        for item in self.get_items(list(ids), project, fields=Client.__selected(wiql)):
+            graph.add(item)
+
+        return graph
+
+    def __new_revisions(
+        self, wi_id: int, known: int, latest: int, project: str | None
+    ) -> list[AzureWorkItem]:
+        revisions = []
+
+        while known < latest:
+            found = call_with_retry(self.get_history, wi_id, project, skip=known)
+
+            if not found:
+                break
+
+            revisions.extend(found)
+            known = max(r.rev for r in found)
+
+        return revisions
+
+    def sync(  # pylint: disable=too-many-arguments
+        self,
+        wiql: Wiql | str,
+        store: RevisionStore,
+        top: int | None = None,
+        project: str | None = None,
+        workers: int = WORKERS,
+    ) -> list[list[AzureObject]]:
+        """Like find() but only fetches revisions that are not in store
+
+        The current revision of each item is fetched in batches
+            and compared to the latest revision in store.
+        Only items that have changed have their new revisions fetched.
+
+        Args:
+            wiql (Wiql | str): The query
+            store (RevisionStore): Where revisions are kept between runs
+            top (int, optional): The number of work items to return. Defaults to None.
+            project (str, optional): Project ID or name. Defaults to None.
+            workers (int, optional): Concurrent history requests. Defaults to WORKERS.
+
+        Returns:
+            list[list[AzureObject]]: List of work items, each is a history of work items
+        """
+        ids = self.find_ids(wiql, top)
+        changed = [
+            (i.id, store.latest(i.id), i.rev)
+            for i in self.get_items(ids, project, fields=["System.Rev"])
         ]
+        changed = [c for c in changed if c[1] < c[2]]
+
+        for revisions in ordered_map(
+            lambda c: self.__new_revisions(*c, project), changed, workers
+        ):
+            store.add(revisions)
+
+        return [store.history(i) for i in ids]
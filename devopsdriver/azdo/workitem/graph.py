@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+
+
+"""Work item parent/child hierarchy
+
+Built from link query results (work_item_relations)
+    or from work items fetched with their relations.
+"""
+
+
+from devopsdriver.azdo.azureobject import AzureObject
+
+
+class Graph:
+    """Work items and the parent/child links between them"""
+
+    CHILD = "System.LinkTypes.Hierarchy-Forward"  # the target is a child
+    PARENT = "System.LinkTypes.Hierarchy-Reverse"  # the target is the parent
+
+    def __init__(self):
+        self.items = {}  # work item id to AzureObject
+        self.children = {}  # work item id to child ids
+        self.parents = {}  # work item id to parent id
+        self.expanded = set()  # ids whose relations have been read
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def __contains__(self, wi_id: int) -> bool:
+        return wi_id in self.items
+
+    @staticmethod
+    def linked_id(url: str) -> int | None:
+        """The id of the work item a relation links to
+
+        Args:
+            url (str): The url of the relation, ie .../_apis/wit/workItems/42
+
+        Returns:
+            int | None: The work item id or None if not a work item url
+        """
+        path, _, last = (url or "").rpartition("/")
+
+        if not path.lower().endswith("/workitems") or not last.isdigit():
+            return None
+
+        return int(last)
+
+    def link(self, rel: str | None, source: int | None, target: int) -> None:
+        """Add a link
+
+        Args:
+            rel (str | None): The link type, only CHILD and PARENT are kept
+            source (int | None): The work item the link is from
+            target (int): The work item the link is to
+        """
+        if source is None or rel not in (Graph.CHILD, Graph.PARENT):
+            return
+
+        parent, child = (source, target) if rel == Graph.CHILD else (target, source)
+        children = self.children.setdefault(parent, [])
+
+        if child not in children:
+            children.append(child)
+
+        self.parents[child] = parent
+
+    def add(self, item: AzureObject) -> None:
+        """Add a work item and its relations (if it was fetched with them)
+
+        Args:
+            item (AzureObject): The work item
+        """
+        wi_id = item.data["id"]
+        self.items[wi_id] = item
+        relations = item.data.get("relations")
+
+        if relations is None:
+            return
+
+        self.expanded.add(wi_id)
+
+        for relation in relations:
+            target = Graph.linked_id(relation.get("url"))
+
+            if target is not None:
+                self.link(relation.get("rel"), wi_id, target)
+
+    def parent(self, wi_id: int) -> AzureObject | None:
+        """The parent of a work item
+
+        Args:
+            wi_id (int): The work item id
+
+        Returns:
+            AzureObject | None: The parent or None if there is none (or not fetched)
+        """
+        return self.items.get(self.parents.get(wi_id))
+
+    def roots(self) -> list[int]:
+        """The work items without a parent
+
+        Returns:
+            list[int]: The ids of the top of each tree
+        """
+        ids = dict.fromkeys(list(self.items) + list(self.children))
+        return [i for i in ids if i not in self.parents]
+
+    def descendants(self, wi_id: int) -> list[AzureObject]:
+        """The children of a work item, their children, and so on
+
+        Args:
+            wi_id (int): The work item id
+
+        Returns:
+            list[AzureObject]: The fetched descendants, each before its children
+        """
+        found = []
+        seen = {wi_id}
+        pending = list(reversed(self.children.get(wi_id, [])))
+
+        while pending:
+            child = pending.pop()
+
+            if child in seen:
+                continue
+
+            seen.add(child)
+
+            if child in self.items:
+                found.append(self.items[child])
+
+            pending.extend(reversed(self.children.get(child, [])))
+
+        return found
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+
+
+"""Find work item revisions by time
+
+Each revision of a work item is valid from its System.ChangedDate
+    until the System.ChangedDate of the next revision (the last revision never ends).
+- the revision of one item at a time is found by bisecting that item's history
+- revisions valid during a time range are found with a centered interval tree
+"""
+
+
+from array import array
+from bisect import bisect_right
+from datetime import datetime
+from itertools import takewhile
+
+from devopsdriver.azdo.azureobject import AzureObject
+from devopsdriver.azdo.timestamp import Timestamp
+from devopsdriver.azdo.workitem.wiql import Wiql, Compare, Expression, Group
+
+
+FOREVER = 2**63 - 1  # the end of the latest revision
+
+
+class RevisionIndex:
+    """An index of revision histories by the time each revision was valid"""
+
+    CHANGED = "System.ChangedDate"
+
+    def __init__(self, histories: list[list[AzureObject]]):
+        """Index histories
+
+        Args:
+            histories (list[list[AzureObject]]): The results of Client.find,
+                                                    revisions without a
+                                                    System.ChangedDate are skipped
+        """
+        self.revisions = []  # every revision, grouped by item, ordered by time
+        self.starts = array("q")  # when revisions[n] became valid
+        self.ends = array("q")  # when revisions[n] stopped being valid
+        self.items = {}  # work item id to (first, last + 1) in revisions
+
+        for history in histories:
+            self.__add(history)
+
+        self.tree = RevisionIndex.__build(
+            [r for r in range(len(self.revisions)) if self.starts[r] < self.ends[r]],
+            self.starts,
+            self.ends,
+        )
+
+    def __add(self, history: list[AzureObject]):
+        dated = [(RevisionIndex.__changed(r), r) for r in history]
+        dated = sorted((d for d in dated if d[0] is not None), key=lambda d: d[0])
+
+        if not dated:
+            return
+
+        first = len(self.revisions)
+        self.revisions.extend(r for _, r in dated)
+        self.starts.extend(s for s, _ in dated)
+        self.ends.extend(s for s, _ in dated[1:])
+        self.ends.append(FOREVER)
+        self.items[dated[0][1].data.get("id")] = (first, len(self.revisions))
+
+    @staticmethod
+    def __changed(revision: AzureObject) -> int | None:
+        stamp = Timestamp.parse(
+            (revision.data.get("fields") or {}).get(RevisionIndex.CHANGED)
+        )
+        return None if stamp is None else stamp.to_microseconds()
+
+    @staticmethod
+    def __microseconds(when: Timestamp | datetime | str) -> int:
+        return (
+            when if isinstance(when, Timestamp) else Timestamp(when)
+        ).to_microseconds()
+
+    @staticmethod
+    def __build(revisions: list[int], starts: array, ends: array) -> list[tuple]:
+        """Build a centered interval tree
+
+        Each node is (center, by_start, by_end, left, right) where
+            by_start and by_end are the revisions that contain center
+            and left and right are node indices (-1 for none).
+
+        Returns:
+            list[tuple]: The nodes, the root is the first
+        """
+        nodes = []
+        pending = [(revisions, None, 0)]  # revisions, parent node, child slot
+
+        while pending:
+            members, parent, slot = pending.pop()
+
+            if not members:
+                continue
+
+            center = sorted(starts[r] for r in members)[len(members) // 2]
+            here = [r for r in members if starts[r] <= center < ends[r]]
+            nodes.append(
+                [
+                    center,
+                    sorted(here, key=lambda r: starts[r]),
+                    sorted(here, key=lambda r: ends[r], reverse=True),
+                    -1,
+                    -1,
+                ]
+            )
+
+            if parent is not None:
+                nodes[parent][slot] = len(nodes) - 1
+
+            pending.append(
+                ([r for r in members if ends[r] <= center], len(nodes) - 1, 3)
+            )
+            pending.append(
+                ([r for r in members if starts[r] > center], len(nodes) - 1, 4)
+            )
+
+        return [tuple(n) for n in nodes]
+
+    def __len__(self) -> int:
+        return len(self.revisions)
+
+    def history(self, wi_id: int) -> list[AzureObject]:
+        """The indexed revisions of a work item
+
+        Args:
+            wi_id (int): The work item id
+
+        Returns:
+            list[AzureObject]: The revisions in the order they were made
+        """
+        first, end = self.items.get(wi_id, (0, 0))
+        return self.revisions[first:end]
+
+    def at(self, wi_id: int, when: Timestamp | datetime | str) -> AzureObject | None:
+        """The revision of a work item at a point in time
+
+        Args:
+            wi_id (int): The work item id
+            when (Timestamp | datetime | str): The point in time
+
+        Returns:
+            AzureObject | None: The revision or None if the item did not exist yet
+        """
+        first, end = self.items.get(wi_id, (0, 0))
+        found = bisect_right(
+            self.starts, RevisionIndex.__microseconds(when), first, end
+        )
+        return self.revisions[found - 1] if found > first else None
+
+    def snapshot(self, when: Timestamp | datetime | str) -> list[AzureObject]:
+        """The revision of every work item at a point in time
+
+        Args:
+            when (Timestamp | datetime | str): The point in time
+
+        Returns:
+            list[AzureObject]: The revision of every item that existed at the time
+        """
+        moment = RevisionIndex.__microseconds(when)
+        return [self.revisions[r] for r in self.__overlapping(moment, moment + 1)]
+
+    def asof(
+        self,
+        wiql: Wiql | Compare | Expression | Group,
+        when: Timestamp | datetime | str,
+    ) -> list[AzureObject]:
+        """Evaluate a query against the revisions at a point in time
+
+        Like a WIQL ASOF query, but without asking the server.
+
+        Args:
+            wiql (Wiql | Compare | Expression | Group): The query
+                                                        or just the where expression
+            when (Timestamp | datetime | str): The point in time
+
+        Returns:
+            list[AzureObject]: The revision of each item that matched at the time
+        """
+        search = wiql.search if isinstance(wiql, Wiql) else wiql
+        found = self.snapshot(when)
+        return found if search is None else [r for r in found if search.matches(r)]
+
+    def overlapping(
+        self, start: Timestamp | datetime | str, end: Timestamp | datetime | str
+    ) -> list[AzureObject]:
+        """The revisions that were valid at any time from start up to end
+
+        Args:
+            start (Timestamp | datetime | str): The start of the range
+            end (Timestamp | datetime | str): The end of the range (not included)
+
+        Returns:
+            list[AzureObject]: The revisions ordered by work item then time
+        """
+        return [
+            self.revisions[r]
+            for r in self.__overlapping(
+                RevisionIndex.__microseconds(start), RevisionIndex.__microseconds(end)
+            )
+        ]
+
+    def __overlapping(self, start: int, end: int) -> list[int]:
+        found = []
+        pending = [0] if self.tree and start < end else []
+
+        while pending:
+            center, by_start, by_end, left, right = self.tree[pending.pop()]
+
+            if end <= center:  # only the earliest of these start in time
+                found.extend(takewhile(lambda r: self.starts[r] < end, by_start))
+                children = (left,)
+
+            elif start > center:  # only the latest of these end in time
+                found.extend(takewhile(lambda r: self.ends[r] > start, by_end))
+                children = (right,)
+
+            else:
+                found.extend(by_start)
+                children = (left, right)
+
+            pending.extend(n for n in children if n >= 0)
+
+        return sorted(found)
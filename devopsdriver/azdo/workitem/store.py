@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+
+
+"""Work item revisions stored locally
+
+Revisions never change once they are made,
+    so only new revisions need to be fetched from Azure.
+"""
+
+
+from json import dumps, loads
+from sqlite3 import connect
+
+from azure.devops.v7_1.work_item_tracking.models import WorkItem as AzureWorkItem
+
+from devopsdriver.azdo.azureobject import AzureObject
+
+
+class RevisionStore:
+    """Work item revisions in a SQLite database"""
+
+    def __init__(self, path: str = ":memory:"):
+        self.connection = connect(path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS revisions ("
+            + "id INTEGER NOT NULL, rev INTEGER NOT NULL, data TEXT, "
+            + "PRIMARY KEY (id, rev))"
+        )
+        self.connection.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def close(self) -> None:
+        """Close the database"""
+        self.connection.close()
+
+    def latest(self, wi_id: int) -> int:
+        """The latest revision stored for a work item
+
+        Args:
+            wi_id (int): The work item id
+
+        Returns:
+            int: The latest revision number or 0 if there are none
+        """
+        (rev,) = self.connection.execute(
+            "SELECT MAX(rev) FROM revisions WHERE id = ?", (wi_id,)
+        ).fetchone()
+        return rev or 0
+
+    def add(self, revisions: list[AzureWorkItem]) -> None:
+        """Store revisions
+
+        Args:
+            revisions (list[AzureWorkItem]): The revisions from Client.get_history
+        """
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO revisions (id, rev, data) VALUES (?, ?, ?)",
+            [(r.id, r.rev, dumps(r.serialize())) for r in revisions],
+        )
+        self.connection.commit()
+
+    def history(self, wi_id: int) -> list[AzureObject]:
+        """Get the stored history of a work item
+
+        Args:
+            wi_id (int): The work item id
+
+        Returns:
+            list[AzureObject]: The revisions in order
+        """
+        return [
+            AzureObject(AzureWorkItem.deserialize(loads(d)))
+            for (d,) in self.connection.execute(
+                "SELECT data FROM revisions WHERE id = ? ORDER BY rev", (wi_id,)
+            )
+        ]
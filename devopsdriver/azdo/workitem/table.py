@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+
+
+"""Work item revisions stored by column
+
+Holding many revisions as AzureObjects costs a model, a dict, and a cache per revision.
+A RevisionTable keeps one list per field instead:
+- strings are interned
+- identities are stored as "Display Name <unique name>" strings
+- timestamps are stored as 64 bit microseconds since the epoch
+"""
+
+
+from array import array
+from collections.abc import Callable, Iterator
+from sys import intern
+
+from devopsdriver.azdo.azureobject import AzureObject
+from devopsdriver.azdo.timestamp import Timestamp
+from devopsdriver.dataobject import DataObject
+
+
+MISSING = -(2**63)  # None in a timestamp column
+
+
+class RevisionTable:
+    """Work item revisions with one column per field
+
+    Fields can be found with the same fuzzy names as DataObject,
+        ie "state", "system_state", or "System.State"
+    """
+
+    ID = "System.Id"
+    REV = "System.Rev"
+
+    def __init__(self, columns: dict[str, list | array]):
+        """Create a table from columns of the same length
+
+        Args:
+            columns (dict[str, list | array]): field name to values,
+                                                array("q") columns hold timestamps
+        """
+        self.columns = columns
+        self.index = DataObject._index(columns)  # pylint: disable=protected-access
+        lengths = {len(c) for c in columns.values()}
+        assert len(lengths) <= 1, lengths
+
+    @staticmethod
+    def from_histories(
+        histories: list[list[AzureObject]], fields: list[str] | None = None
+    ) -> "RevisionTable":
+        """Create a table from the results of Client.find
+
+        Args:
+            histories (list[list[AzureObject]]): work item histories
+            fields (list[str], optional): The fields to keep, ie System.State.
+                                            Defaults to None (every field found).
+
+        Returns:
+            RevisionTable: A row for every revision
+        """
+        revisions = [r for h in histories for r in h]
+        found = [r.data.get("fields") or {} for r in revisions]
+
+        if fields is None:
+            fields = list(dict.fromkeys(f for r in found for f in r))
+
+        fields = [f for f in fields if f not in (RevisionTable.ID, RevisionTable.REV)]
+        columns = {
+            RevisionTable.ID: [r.data.get("id") for r in revisions],
+            RevisionTable.REV: [r.data.get("rev") for r in revisions],
+        }
+        columns.update(
+            {f: RevisionTable.__column([r.get(f) for r in found]) for f in fields}
+        )
+        return RevisionTable(columns)
+
+    @staticmethod
+    def __compact(value: any) -> any:
+        if isinstance(value, str):
+            return intern(value)
+
+        if isinstance(value, dict) and "displayName" in value:
+            name = value["displayName"]
+            unique = value.get("uniqueName")
+            return intern(f"{name} <{unique}>" if unique else name)
+
+        return value
+
+    @staticmethod
+    def __column(values: list) -> list | array:
+        stamps = Timestamp.parse_many(values)
+
+        if any(s is not None for s in stamps) and all(
+            (s is None) == (v is None) for s, v in zip(stamps, values)
+        ):
+            return array("q", (RevisionTable.__microseconds(s) for s in stamps))
+
+        return [RevisionTable.__compact(v) for v in values]
+
+    @staticmethod
+    def __microseconds(stamp: Timestamp | None) -> int:
+        if stamp is None:
+            return MISSING
+
+        return stamp.to_microseconds()
+
+    @staticmethod
+    def __decode(column: list | array, row: int) -> any:
+        value = column[row]
+
+        if isinstance(column, array):
+            return None if value == MISSING else Timestamp.from_microseconds(value)
+
+        return value
+
+    def __len__(self) -> int:
+        return len(self.columns[RevisionTable.ID]) if self.columns else 0
+
+    def __getitem__(self, row: int) -> "RevisionTable.Row":
+        return RevisionTable.Row(self, row if row >= 0 else len(self) + row)
+
+    def __iter__(self) -> Iterator["RevisionTable.Row"]:
+        return (RevisionTable.Row(self, r) for r in range(len(self)))
+
+    def values(self, row: int) -> dict[str, any]:
+        """The values in a row
+
+        Args:
+            row (int): The row number
+
+        Returns:
+            dict[str, any]: field name to value (Timestamps for timestamp fields)
+        """
+        return {f: RevisionTable.__decode(c, row) for f, c in self.columns.items()}
+
+    def field(self, name: str) -> str | None:
+        """Find the field name that matches
+
+        Args:
+            name (str): The fuzzy name, ie "state"
+
+        Returns:
+            str | None: The field name, ie "System.State" or None if not found
+        """
+        found = self.index.get(name.lower(), ())
+        assert len(found) in {0, 1}, found
+        return found[0] if found else None
+
+    def __named(self, name: str) -> list | array:
+        field = self.field(name)
+
+        if field is None:
+            raise KeyError(name)
+
+        return self.columns[field]
+
+    def column(self, name: str) -> list:
+        """The values for a field
+
+        Args:
+            name (str): The fuzzy name of the field
+
+        Returns:
+            list: The value for every row (Timestamps for timestamp fields)
+
+        Raises:
+            KeyError: If no field matches the name
+        """
+        column = self.__named(name)
+        return [RevisionTable.__decode(column, r) for r in range(len(column))]
+
+    def rows(self, rows: list[int]) -> "RevisionTable":
+        """A table of just some rows
+
+        Args:
+            rows (list[int]): The row numbers to keep, in the order to keep them
+
+        Returns:
+            RevisionTable: The new table
+        """
+        return RevisionTable(
+            {
+                f: (
+                    array("q", (c[r] for r in rows))
+                    if isinstance(c, array)
+                    else [c[r] for r in rows]
+                )
+                for f, c in self.columns.items()
+            }
+        )
+
+    def filter(self, name: str, test: Callable[[any], bool]) -> "RevisionTable":
+        """The rows where a field value passes a test
+
+        Args:
+            name (str): The fuzzy name of the field
+            test (Callable[[any], bool]): Given the value, True to keep the row
+
+        Returns:
+            RevisionTable: The rows that passed
+
+        Raises:
+            KeyError: If no field matches the name
+        """
+        column = self.__named(name)
+        return self.rows(
+            [r for r in range(len(column)) if test(RevisionTable.__decode(column, r))]
+        )
+
+    def group_by(self, name: str) -> dict[any, "RevisionTable"]:
+        """Split the rows by the value of a field
+
+        Args:
+            name (str): The fuzzy name of the field
+
+        Returns:
+            dict[any, RevisionTable]: value to the rows with that value (in order)
+
+        Raises:
+            KeyError: If no field matches the name
+        """
+        column = self.__named(name)
+        groups = {}
+
+        for row, value in enumerate(column):
+            groups.setdefault(value, []).append(row)
+
+        return {
+            RevisionTable.__decode(column, r[0]): self.rows(r) for r in groups.values()
+        }
+
+    class Row(DataObject):  # pylint: disable=too-few-public-methods
+        """One revision in a table"""
+
+        def __init__(self, table: "RevisionTable", row: int):
+            super().__init__(table.values(row))
+            # the row has the same field names as the table, share the index
+            self._indices[id(self.data)] = (self.data, table.index)
@@ -20,7 +20,13 @@ ASOF '02-11-2020'
 """
 
 
+from copy import copy
 from datetime import datetime, date
+from operator import eq, ne, lt, gt, le, ge
+
+from devopsdriver.azdo.azureobject import AzureObject
+from devopsdriver.azdo.timestamp import Timestamp
+from devopsdriver.azdo.workitem.table import RevisionTable
 
 
 class Field:  # pylint: disable=too-few-public-methods
@@ -42,7 +48,9 @@ class Field:  # pylint: disable=too-few-public-methods
     def __init__(self, value: str):
         self.value = value
 
-    def __str__(self) -> str:
+    @property
+    def reference(self) -> str:
+        """The reference name of the field, ie System.State"""
         if self.value in Field.SYSTEM:
             prefix = "System."
 
@@ -52,7 +60,26 @@ class Field:  # pylint: disable=too-few-public-methods
         else:
             prefix = ""
 
-        return f"[{prefix}{self.value}]"
+        return f"{prefix}{self.value}"
+
+    def __str__(self) -> str:
+        return f"[{self.reference}]"
+
+    def lookup(self, item) -> any:
+        """The value of this field in a work item
+
+        Args:
+            item (DataObject): An AzureObject work item or a RevisionTable row
+
+        Returns:
+            any: The value of the field or None if it is empty
+        """
+        value = getattr(item, self.reference)
+
+        if value is None and self.reference != self.value:
+            return getattr(item, self.value)
+
+        return value
 
 
 class OrderBy:  # pylint: disable=too-few-public-methods
@@ -105,6 +132,16 @@ class Value:  # pylint: disable=too-few-public-methods
         raise AssertionError("Unknown type")
 
 
+class Values:  # pylint: disable=too-few-public-methods
+    """A list of constant values, ie for IN"""
+
+    def __init__(self, *values: Value | date | datetime | int | float | str):
+        self.values = [v if isinstance(v, Value) else Value(v) for v in values]
+
+    def __str__(self) -> str:
+        return f"({', '.join(str(v) for v in self.values)})"
+
+
 class IsEmpty:  # pylint: disable=too-few-public-methods
     """Compare a field to a value"""
 
@@ -114,6 +151,17 @@ class IsEmpty:  # pylint: disable=too-few-public-methods
     def __str__(self) -> str:
         return f"{str(self.field)} IS EMPTY"
 
+    def matches(self, item) -> bool:
+        """Does the work item match
+
+        Args:
+            item (DataObject): An AzureObject work item or a RevisionTable row
+
+        Returns:
+            bool: True if the field has no value
+        """
+        return self.field.lookup(item) in (None, "", [])
+
 
 class IsNotEmpty:  # pylint: disable=too-few-public-methods
     """Compare a field to a value"""
@@ -124,10 +172,24 @@ class IsNotEmpty:  # pylint: disable=too-few-public-methods
     def __str__(self) -> str:
         return f"{str(self.field)} IS NOT EMPTY"
 
+    def matches(self, item) -> bool:
+        """Does the work item match
+
+        Args:
+            item (DataObject): An AzureObject work item or a RevisionTable row
+
+        Returns:
+            bool: True if the field has a value
+        """
+        return self.field.lookup(item) not in (None, "", [])
+
 
 class Compare:  # pylint: disable=too-few-public-methods
     """Compare a field to a value"""
 
+    OPERATORS = {"=": eq, "<>": ne, "<": lt, ">": gt, "<=": le, ">=": ge}
+    DATE_FORMATS = ("%Y-%m-%d", "%m/%d/%Y")  # dates without a time
+
     def __init__(
         self,
         field: Field | str,
@@ -140,9 +202,128 @@ class Compare:  # pylint: disable=too-few-public-methods
             value if value_is_computed or isinstance(value, Value) else Value(value)
         )
         self.operator = operator
+        self.__rendered = None
 
     def __str__(self) -> str:
-        return f"{str(self.left)} {self.operator} {str(self.right)}"
+        if self.__rendered is None:
+            self.__rendered = f"{str(self.left)} {self.operator} {str(self.right)}"
+
+        return self.__rendered
+
+    def matches(self, item) -> bool:
+        """Does the work item match
+
+        Strings are compared without case, identities match their display name,
+            unique name, or "display name <unique name>",
+            and timestamps are compared by day when the value is a date.
+
+        Args:
+            item (DataObject): An AzureObject work item or a RevisionTable row
+
+        Returns:
+            bool: True if the field value passes the comparison
+        """
+        if not isinstance(self.right, Value):
+            raise ValueError(f"Only the server can evaluate {self}")
+
+        return Compare._test(self.operator, self.left.lookup(item), self.right.value)
+
+    @staticmethod
+    def _test(operator: str, actual: any, expected: any) -> bool:
+        """Compare a field value to an expected value
+
+        Like the server, strings are converted to the type of the field,
+            ie "2" for a number or "01/05/2024" for a date.
+
+        Args:
+            operator (str): One of OPERATORS
+            actual (any): The value of the field
+            expected (any): The value of a Value
+
+        Returns:
+            bool: The result of the comparison
+
+        Raises:
+            ValueError: If expected cannot be compared to the field value
+        """
+        if actual is None:
+            return operator == "<>"
+
+        expected = Compare.__expected(actual, expected)
+        candidates = Compare.__candidates(actual, expected)
+
+        if operator == "<>":
+            return expected not in candidates
+
+        try:
+            return any(Compare.OPERATORS[operator](c, expected) for c in candidates)
+
+        except TypeError as error:
+            raise ValueError(f"Cannot compare {actual!r} to {expected!r}") from error
+
+    @staticmethod
+    def __expected(actual: any, expected: any) -> any:
+        """expected converted to something that can be compared to actual"""
+        if isinstance(expected, datetime):
+            return Timestamp(expected)
+
+        if not isinstance(expected, str):
+            return expected
+
+        if isinstance(actual, Timestamp):
+            return Compare.__moment(expected)
+
+        if isinstance(actual, (int, float)) and not isinstance(actual, bool):
+            try:
+                return int(expected) if isinstance(actual, int) else float(expected)
+
+            except ValueError:
+                try:
+                    return float(expected)
+
+                except ValueError as error:
+                    raise ValueError(f"{expected!r} is not a number") from error
+
+        return expected.casefold()
+
+    @staticmethod
+    def __moment(expected: str) -> Timestamp | date:
+        """A timestamp, or a date (compared by day), from a string"""
+        stamp = Timestamp.parse(expected)
+
+        if stamp is not None:
+            return stamp
+
+        for layout in Compare.DATE_FORMATS:
+            try:
+                return datetime.strptime(expected, layout).date()
+
+            except ValueError:
+                pass
+
+        try:
+            return Timestamp(datetime.fromisoformat(expected))
+
+        except ValueError as error:
+            raise ValueError(f"{expected!r} is not a date") from error
+
+    @staticmethod
+    def __candidates(actual: any, expected: any) -> list:
+        """The forms of actual that can be compared to expected"""
+        if isinstance(actual, Timestamp) and not isinstance(expected, Timestamp):
+            return [actual.value.date()] if isinstance(expected, date) else [actual]
+
+        if isinstance(actual, dict) and "displayName" in actual:
+            name, unique = actual["displayName"], actual.get("uniqueName")
+            actual = f"{name} <{unique}>" if unique else name
+
+        if isinstance(actual, str):
+            actual = actual.casefold()
+            name, _, unique = actual[:-1].partition(" <")
+            identity = actual.endswith(">") and unique
+            return [actual, name, unique] if identity else [actual]
+
+        return [actual]
 
 
 class In(Compare):  # pylint: disable=too-few-public-methods
@@ -153,12 +334,20 @@ class In(Compare):  # pylint: disable=too-few-public-methods
         field: Field | str,
         *values: Value | str | date | datetime | int | float,
     ):
-        super().__init__(
-            field,
-            f"({', '.join(str(v if isinstance(v, Value) else Value(v)) for v in values)})",
-            "IN",
-            value_is_computed=True,
-        )
+        super().__init__(field, Values(*values), "IN", value_is_computed=True)
+        self.values = self.right.values
+
+    def matches(self, item) -> bool:
+        """Does the work item match
+
+        Args:
+            item (DataObject): An AzureObject work item or a RevisionTable row
+
+        Returns:
+            bool: True if the field value is one of the values
+        """
+        actual = self.left.lookup(item)
+        return any(Compare._test("=", actual, v.value) for v in self.values)
 
 
 class NotIn(Compare):  # pylint: disable=too-few-public-methods
@@ -169,12 +358,20 @@ class NotIn(Compare):  # pylint: disable=too-few-public-methods
         field: Field | str,
         *values: Value | str | date | datetime | int | float,
     ):
-        super().__init__(
-            field,
-            f"({', '.join(str(v if isinstance(v, Value) else Value(v)) for v in values)})",
-            "NOT IN",
-            value_is_computed=True,
-        )
+        super().__init__(field, Values(*values), "NOT IN", value_is_computed=True)
+        self.values = self.right.values
+
+    def matches(self, item) -> bool:
+        """Does the work item match
+
+        Args:
+            item (DataObject): An AzureObject work item or a RevisionTable row
+
+        Returns:
+            bool: True if the field value is none of the values
+        """
+        actual = self.left.lookup(item)
+        return all(Compare._test("<>", actual, v.value) for v in self.values)
 
 
 class Equal(Compare):  # pylint: disable=too-few-public-methods
@@ -237,9 +434,27 @@ class Expression:  # pylint: disable=too-few-public-methods
     def __init__(self, operator: str, *compares):
         self.operator = operator
         self.expressions = compares
+        self.__rendered = None
 
     def __str__(self) -> str:
-        return f" {self.operator} ".join(str(e) for e in self.expressions)
+        if self.__rendered is None:
+            self.__rendered = f" {self.operator} ".join(
+                str(e) for e in self.expressions
+            )
+
+        return self.__rendered
+
+    def matches(self, item) -> bool:
+        """Does the work item match
+
+        Args:
+            item (DataObject): An AzureObject work item or a RevisionTable row
+
+        Returns:
+            bool: True if all (AND) or any (OR) of the expressions match
+        """
+        test = all if self.operator == "AND" else any
+        return test(e.matches(item) for e in self.expressions)
 
 
 class And(Expression):  # pylint: disable=too-few-public-methods
@@ -256,25 +471,73 @@ class Or(Expression):  # pylint: disable=too-few-public-methods
         super().__init__("OR", *compares)
 
 
+class Group:  # pylint: disable=too-few-public-methods
+    """Parenthesize an expression"""
+
+    def __init__(self, expression: Compare | Expression):
+        self.expression = expression
+        self.__rendered = None
+
+    def __str__(self) -> str:
+        if self.__rendered is None:
+            self.__rendered = f"({self.expression})"
+
+        return self.__rendered
+
+    def matches(self, item) -> bool:
+        """Does the work item match
+
+        Args:
+            item (DataObject): An AzureObject work item or a RevisionTable row
+
+        Returns:
+            bool: True if the expression matches
+        """
+        return self.expression.matches(item)
+
+
 class Wiql:
-    """Build a WIQL query"""
+    """Build a WIQL query
+
+    A Wiql is never changed once built, every builder method returns a new Wiql.
+    This makes it safe to share between threads, build variants from a template,
+        and use as a dict key.
+    """
 
     def __init__(self):
-        self.selected = [Field("Id")]
+        self.selected = (Field("Id"),)
         self.search = None
-        self.order = []
+        self.order = ()
         self.snapshot = None
         self.source = "WorkItems"
         self.mode_type = None
+        self.__rendered = None
+
+    def __with(self, name: str, value: any):
+        """a copy of this query with one attribute changed"""
+        changed = copy(self)
+        setattr(changed, name, value)
+        # pylint: disable-next=protected-access,unused-private-member
+        changed.__rendered = None
+        return changed
 
     def select(self, *fields: Field | str):
         """The fields to select
 
         Returns:
-            Builder: Returns self for chaining
+            Wiql: A new query for chaining
+        """
+        return self.__with(
+            "selected", tuple(f if isinstance(f, Field) else Field(f) for f in fields)
+        )
+
+    def fields(self) -> list[str]:
+        """The reference names of the selected fields
+
+        Returns:
+            list[str]: ie ["System.Id", "System.State"]
         """
-        self.selected = [f if isinstance(f, Field) else Field(f) for f in fields]
-        return self
+        return [f.reference for f in self.selected]
 
     def where(self, expression: Compare | And | Or):
         """Search criteria
@@ -283,29 +546,25 @@ class Wiql:
             expression (Expression|Compare): An expression of what to search for.
 
         Returns:
-            Builder: self for chaining calls
+            Wiql: A new query for chaining
         """
-        self.search = expression
-        return self
+        return self.__with("search", expression)
 
     def from_source(self, source: str):
         """Sets the FROM field"""
-        self.source = source
-        return self
+        return self.__with("source", source)
 
     def mode(self, results_mode: str):
         """Sets the mode for link queries"""
-        self.mode_type = results_mode
-        return self
+        return self.__with("mode_type", results_mode)
 
     def order_by(self, *orders):
         """Set the fields to order the results by
 
         Returns:
-            Builder: Returns self for chaining
+            Wiql: A new query for chaining
         """
-        self.order = orders
-        return self
+        return self.__with("order", orders)
 
     def asof(self, stamp: Value | date | datetime | str):
         """Set the view of the data
@@ -314,18 +573,89 @@ class Wiql:
             stamp (Value): The date or datetime in a Value
 
         Returns:
-            Builder: self for chainingd
+            Wiql: A new query for chaining
         """
         assert isinstance(stamp, (Value, date, datetime, str)), stamp
-        self.snapshot = stamp if isinstance(stamp, (Value, str)) else Value(stamp)
-        return self
+        return self.__with(
+            "snapshot", stamp if isinstance(stamp, (Value, str)) else Value(stamp)
+        )
 
     def __str__(self) -> str:
-        select = ", ".join(str(s) for s in self.selected)
-        where = f" WHERE {self.search}" if self.search else ""
-        order = (
-            f" ORDER BY {', '.join(str(o) for o in self.order)}" if self.order else ""
-        )
-        asof = f" ASOF {str(self.snapshot)}" if self.snapshot else ""
-        mode = f" MODE({self.mode_type})" if self.mode_type else ""
-        return f"SELECT {select} FROM {self.source}{where}{order}{asof}{mode}"
+        if self.__rendered is None:
+            select = ", ".join(str(s) for s in self.selected)
+            where = f" WHERE {self.search}" if self.search else ""
+            order = (
+                f" ORDER BY {', '.join(str(o) for o in self.order)}"
+                if self.order
+                else ""
+            )
+            asof = f" ASOF {str(self.snapshot)}" if self.snapshot else ""
+            mode = f" MODE({self.mode_type})" if self.mode_type else ""
+            self.__rendered = (
+                f"SELECT {select} FROM {self.source}{where}{order}{asof}{mode}"
+            )
+
+        return self.__rendered
+
+    def __hash__(self) -> int:
+        return hash(str(self))
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Wiql) and str(self) == str(other)
+
+    def matches(self, item) -> bool:
+        """Does a work item match the search criteria
+
+        Args:
+            item (DataObject): An AzureObject work item or a RevisionTable row
+
+        Returns:
+            bool: True if there is no search or the item matches it
+        """
+        return self.search is None or self.search.matches(item)
+
+    def evaluate(
+        self, items: list[AzureObject] | RevisionTable
+    ) -> list[AzureObject] | RevisionTable:
+        """Run the query against work items that have already been downloaded
+
+        The search filters the items, order_by sorts them (empty values first),
+            and the selected fields are kept (all fields if only Id is selected).
+
+        Args:
+            items (list[AzureObject] | RevisionTable): The work items to search
+
+        Returns:
+            list[AzureObject] | RevisionTable: The matching work items
+        """
+        rows = list(items)
+        found = [n for n, item in enumerate(rows) if self.matches(item)]
+
+        for order in reversed(self.order):  # stable sorts, least significant first
+            found.sort(
+                key=lambda n, f=order.field: Wiql.__sort_key(f.lookup(rows[n])),
+                reverse=order.order == "DESC",
+            )
+
+        fields = None if self.fields() == ["System.Id"] else self.fields()
+
+        if isinstance(items, RevisionTable):
+            table = items.rows(found)
+            keep = set(table.columns if fields is None else fields)
+            keep.update((RevisionTable.ID, RevisionTable.REV))
+            return RevisionTable({f: c for f, c in table.columns.items() if f in keep})
+
+        if fields is None:
+            return [rows[n] for n in found]
+
+        return [AzureObject(rows[n].raw, fields) for n in found]
+
+    @staticmethod
+    def __sort_key(value: any) -> tuple:
+        if isinstance(value, dict) and "displayName" in value:
+            value = value["displayName"]
+
+        if isinstance(value, str):
+            value = value.casefold()
+
+        return (value is not None, value)
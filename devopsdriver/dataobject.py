@@ -11,21 +11,32 @@ class DataObject:  # pylint: disable=too-few-public-methods
 
     def __init__(self, data: dict):
         self.data = data
+        self._indices = {}
 
-    def _matches_field(self, name: str, field: str) -> bool:
-        name = name.lower()
-        field = field.lower()
+    @staticmethod
+    def _index(data: dict) -> dict[str, list[str]]:
+        """Map every name that matches a field to the fields it matches
 
-        if name == field:
-            return True
+        A field matches its lowercase name,
+            the name with dots replaced by underscores,
+            and the last dotted part of the name.
 
-        if name == field.replace(".", "_"):
-            return True
+        Args:
+            data (dict): The fields
 
-        if name == field.split(".")[-1]:
-            return True
+        Returns:
+            dict[str, list[str]]: lowercase names to matching field names
+        """
+        index = {}
 
-        return False
+        for field in data:
+            lowercase = field.lower()
+            names = {lowercase, lowercase.replace(".", "_"), lowercase.split(".")[-1]}
+
+            for name in names:
+                index.setdefault(name, []).append(field)
+
+        return index
 
     def _parse_value(self, data: any) -> any:
         if isinstance(data, dict):
@@ -36,15 +47,27 @@ class DataObject:  # pylint: disable=too-few-public-methods
 
         return data
 
-    def _get_field(self, name: str, data: dict) -> any:
+    @staticmethod
+    def _original(data: dict) -> dict:
+        """The dict that data was parsed from"""
+        return data._source if isinstance(data, DataObject._Dict) else data
+
+    def _find_field(self, name: str, data: dict) -> str | None:
         assert name and data, f"name = {name} data = {data}"
-        found = [f for f in data if self._matches_field(name, f)]
-        assert len(found) in {0, 1}, found
+        source = DataObject._original(data)
+        cached = self._indices.get(id(source), None)
+
+        if cached is None or cached[0] is not source:
+            cached = (source, DataObject._index(source))
+            self._indices[id(source)] = cached
 
-        if len(found) == 1:
-            return self._parse_value(data[found[0]])
+        found = cached[1].get(name.lower(), ())
+        assert len(found) in {0, 1}, found
+        return found[0] if found else None
 
-        return None
+    def _get_field(self, name: str, data: dict) -> any:
+        field = self._find_field(name, data)
+        return None if field is None else self._parse_value(data[field])
 
     def __getattr__(self, name: str) -> any:
         return self._get_field(name, self.data)
@@ -58,6 +81,7 @@ class DataObject:  # pylint: disable=too-few-public-methods
     class _Dict(dict):
         def __init__(self, dataobject, data: dict):
             self.dataobject = dataobject
+            self._source = data  # the indices are cached by the original dict
             super().__init__(data)
 
         def __getattr__(self, name: str) -> any:
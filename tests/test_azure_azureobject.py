@@ -2,6 +2,8 @@
 
 """ Test work item """
 
+from azure.devops.v7_1.work_item_tracking.models import WorkItem
+
 from devopsdriver.azdo import AzureObject
 
 
@@ -74,6 +76,17 @@ class MockAzureWorkItem:  # pylint: disable=too-few-public-methods
         }
 
 
+class CountingWorkItem(MockAzureWorkItem):  # pylint: disable=too-few-public-methods
+    """counts calls to as_dict"""
+
+    calls = 0
+
+    def as_dict(self):
+        """mock out as_dict"""
+        CountingWorkItem.calls += 1
+        return super().as_dict()
+
+
 def test_workitem() -> None:
     """test basic work item"""
     wi = AzureObject(MockAzureWorkItem())
@@ -99,6 +112,57 @@ def test_timestamp() -> None:
     ), wi.changedBy.changedOn
 
 
+def test_memoized() -> None:
+    """test values are only parsed once"""
+    wi = AzureObject(MockAzureWorkItem())
+    parsed = []
+    original = wi._parse_value
+    wi._parse_value = lambda d: parsed.append(d) or original(d)
+
+    for _ in range(100):
+        assert wi.ChangedDate is wi.changeddate
+        assert wi.createdBy is wi.CreatedBy
+        assert wi.createdBy.displayName == "Edna Johnson Z"
+        assert wi.changedBy.changedOn is wi.changedBy.changedOn
+        assert wi.changedBy.changedOn == wi.ChangedDate
+
+    assert len(parsed) == 5, parsed
+
+
+def test_lazy() -> None:
+    """test deferring conversion to a dict until a field is accessed"""
+    raw = [CountingWorkItem() for _ in range(100000)]
+    items = [AzureObject(r, lazy=True) for r in raw]
+    assert CountingWorkItem.calls == 0, CountingWorkItem.calls
+    assert items[7].State == "New", items[7].data
+    assert items[7].ChangedDate is items[7].ChangedDate
+    assert CountingWorkItem.calls == 1, CountingWorkItem.calls
+    items = [AzureObject(r) for r in raw[:10000]]
+    assert CountingWorkItem.calls == 10001, CountingWorkItem.calls
+    AzureObject.LAZY = True
+    assert str(AzureObject(CountingWorkItem())).startswith("{")
+    AzureObject.LAZY = False
+
+
+def test_projection() -> None:
+    """test only converting some fields"""
+    raw = WorkItem(
+        id=5,
+        rev=2,
+        fields={"System.State": "New", "System.Title": "test", "System.Tags": "a"},
+        relations=[],
+    )
+    wi = AzureObject(raw, ["System.State", "System.Tags", "System.Reason"])
+    assert wi.id == 5 and wi.rev == 2, wi
+    assert wi.data["fields"] == {"System.State": "New", "System.Tags": "a"}, wi
+    assert wi.title is None, wi.title
+    assert AzureObject(raw).title == "test"
+    assert wi.raw.fields["System.Title"] == "test"
+
+
 if __name__ == "__main__":
+    test_projection()
+    test_lazy()
+    test_memoized()
     test_timestamp()
     test_workitem()
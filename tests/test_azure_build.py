@@ -2,9 +2,14 @@
 
 """ Test build object """
 
+from collections.abc import Iterator
+from random import Random
+from threading import Lock
+from time import sleep
 from types import SimpleNamespace
 
 from devopsdriver.azdo.builds.build import Build
+from devopsdriver.azdo.logcache import LogCache
 from devopsdriver.azdo.azureobject import AzureObject
 
 
@@ -52,6 +57,115 @@ class MockClient:
         )
 
 
+class MockSlowClient:
+    """mock build client with many steps and slow log downloads"""
+
+    def __init__(self, count: int):
+        self.count = count
+        self.lock = Lock()
+        self.running = 0
+        self.most = 0
+
+    def get_build_log_lines(self, project, build_id, log_id) -> list[str]:
+        """mock get_build_log_lines"""
+        with self.lock:
+            self.running += 1
+            self.most = max(self.most, self.running)
+
+        sleep(0.01)
+
+        with self.lock:
+            self.running -= 1
+
+        return [f"project={project}", f"build={build_id}", f"log={log_id}"]
+
+    def get_build_timeline(self, project, build_id):
+        """mock get_build_timeline, a job with count tasks"""
+        assert project == "project" and build_id == 12
+        return SimpleNamespace(
+            records=[MockTimeline({"parent_id": None, "id": "job", "log": None})]
+            + [
+                MockTimeline({"parent_id": "job", "id": f"{i}", "log": {"id": i}})
+                for i in range(self.count)
+            ]
+        )
+
+
+class MockLargeClient:
+    """mock build client with a 20,000 record timeline
+
+    There are 100 jobs of 170 tasks (in shuffled order) and a 3,000 deep chain
+    """
+
+    def __init__(self):
+        self.records = [{"parent_id": None, "id": "root", "log": {"id": 0}}]
+        self.expected = ["0"]
+
+        for job in range(100):
+            self.records.append(
+                {"parent_id": "root", "id": f"j{job}", "order": job, "log": None}
+            )
+            self.expected.extend(f"{job}.{task}" for task in range(170))
+            self.records.extend(
+                {
+                    "parent_id": f"j{job}",
+                    "id": f"t{job}.{task}",
+                    "order": task,
+                    "log": {"id": f"{job}.{task}"},
+                }
+                for task in range(170)
+            )
+
+        for depth in range(2999):
+            self.records.append(
+                {
+                    "parent_id": f"d{depth - 1}" if depth else "root",
+                    "id": f"d{depth}",
+                    "order": 100,
+                    "start_time": "2024-02-05T03:13:24.16Z",
+                    "log": {"id": f"d{depth}"},
+                }
+            )
+            self.expected.append(f"d{depth}")
+
+        Random(7).shuffle(self.records)
+
+    def get_build_log_lines(self, project, build_id, log_id) -> list[str]:
+        """mock get_build_log_lines"""
+        assert project == "project" and build_id == 12
+        return [f"{log_id}"]
+
+    def get_build_timeline(self, project, build_id):
+        """mock get_build_timeline"""
+        assert project == "project" and build_id == 12
+        return SimpleNamespace(records=[MockTimeline(r) for r in self.records])
+
+
+class MockRangeClient(MockClient):
+    """mock build client that counts downloads and honors line ranges"""
+
+    def __init__(self):
+        self.downloads = []
+
+    def get_build_log_lines(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self, project, build_id, log_id, start_line=None, end_line=None
+    ) -> list[str]:
+        """mock get_build_log_lines"""
+        self.downloads.append((log_id, start_line, end_line))
+        lines = super().get_build_log_lines(project, build_id, log_id)
+        return lines[(start_line or 1) - 1 : end_line]
+
+    def get_build_log(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self, project, build_id, log_id, start_line=None, end_line=None
+    ) -> Iterator[bytes]:
+        """mock get_build_log, 5 bytes at a time"""
+        lines = self.get_build_log_lines(
+            project, build_id, log_id, start_line, end_line
+        )
+        data = "".join(f"{l}\r\n" for l in lines).encode("utf-8")
+        return (data[i : i + 5] for i in range(0, len(data), 5))
+
+
 class MockBuild(AzureObject):  # pylint: disable=too-few-public-methods
     """mock build client"""
 
@@ -94,6 +208,78 @@ def test_azure_object() -> None:
     ), repr(build)
 
 
+def test_concurrent_logs() -> None:
+    """test logs are downloaded concurrently and kept in order"""
+    client = MockSlowClient(40)
+    build = Build(client, MockBuild({"project": {"name": "project"}, "id": 12}))
+    logs = build.get_logs(workers=8).all_logs()
+    assert logs == [f"project=project\nbuild=12\nlog={i}" for i in range(40)], logs
+    assert 1 < client.most <= 8, client.most
+
+
+def test_large_timeline() -> None:
+    """test building the step tree for a large, deep timeline"""
+    client = MockLargeClient()
+    build = Build(client, MockBuild({"project": {"name": "project"}, "id": 12}))
+    root = build.get_logs()
+    logs = root.all_logs()
+    assert len(client.records) == 20100, len(client.records)
+    assert logs == client.expected, logs[:10]
+
+
+def test_lazy_logs() -> None:
+    """test logs are only downloaded when accessed"""
+    client = MockRangeClient()
+    build = Build(client, MockBuild({"project": {"name": "project"}, "id": 12}))
+    root = build.get_logs(prefetch=False)
+    assert not client.downloads, client.downloads
+    assert list(root.children[0].lines(start_line=3)) == ["log=6"]
+    assert list(root.children[0].lines(2, 2)) == ["build=12"]
+    assert client.downloads == [(6, 3, None), (6, 2, 2)], client.downloads
+    assert root.log_contents == "project=project\nbuild=12\nlog=9"
+    assert root.all_logs()[0] is root.log_contents
+    assert len(client.downloads) == 4, client.downloads
+    assert client.downloads[2:] == [(9, None, None), (6, None, None)]
+    root.children[0].log_contents = "replaced"
+    assert root.all_logs() == [root.log_contents, "replaced"]
+    assert Build.Step(MockTimeline({"id": "1", "log": {"id": 1}})).log_contents is None
+    assert not list(Build.Step(MockTimeline({"id": "1", "log": None}), build).lines())
+    chunks = [b"caf\xc3", b"\xa9\r\nlast"]
+    streamed = Build(
+        SimpleNamespace(get_build_log=lambda *_: iter(chunks)),
+        MockBuild({"project": {"name": "project"}, "id": 12}),
+    )
+    assert list(streamed.stream_lines(3)) == ["caf\u00e9", "last"]
+    prefetched = build.get_logs()
+    assert len(client.downloads) == 6, client.downloads
+    assert prefetched.children[0].log_contents.endswith("log=6")
+    assert len(client.downloads) == 6, client.downloads
+
+
+def test_cached_logs() -> None:
+    """test logs of completed builds are only downloaded once"""
+    cache = LogCache()
+    client = MockRangeClient()
+    data = {"project": {"name": "project"}, "id": 12, "status": "inProgress"}
+    assert Build(client, MockBuild(data), cache).get_logs().all_logs()
+    assert len(client.downloads) == 2 and not cache
+    data["status"] = "completed"
+    first = Build(client, MockBuild(data), cache).get_logs().all_logs()
+    assert len(client.downloads) == 4 and len(cache) == 2
+    client.downloads.clear()
+    build = Build(client, MockBuild(data), cache)
+    assert build.get_logs().all_logs() == first
+    root = build.get_logs(prefetch=False)
+    assert list(root.lines(2, 3)) == ["build=12", "log=9"]
+    assert list(root.children[0].lines(start_line=3)) == ["log=6"]
+    assert not client.downloads, client.downloads
+    assert cache.get("project|12|9") == first[0]
+
+
 if __name__ == "__main__":
+    test_cached_logs()
+    test_lazy_logs()
+    test_large_timeline()
+    test_concurrent_logs()
     test_basic()
     test_azure_object()
@@ -2,75 +2,156 @@
 
 """ Test azure build client """
 
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+from json import dumps
+from threading import Event
+from urllib.parse import unquote
+
+from azure.devops.v7_1.build import BuildClient
+from requests import Response
 
 from devopsdriver.azdo.builds.client import Client
 
 
-class MockObject:
-    """mock object"""
-
-    def __init__(self, d: dict):
-        self.d = d
-
-    def as_dict(self) -> dict:
-        """mock as_dict
-
-        Returns:
-            dict: the dict
-        """
-        return self.d
-
-
-class MockClient:
-    """mock build client"""
-
-    def get_builds(
-        self,
-        project,
-        definitions,
-        min_time,
-        max_time,
-        status_filter,
-        result_filter,
-        properties,
-        branch_name,
-        continuation_token=None,
-    ):
-        """mock get_builds"""
-        return [
-            MockObject(
-                {
-                    "project": project,
-                    "pipelines": definitions,
-                    "start": min_time,
-                    "end": max_time,
-                    "status": status_filter,
-                    "result": result_filter,
-                    "fields": properties,
-                    "branch": branch_name,
-                    "token": continuation_token,
-                }
-            )
-        ]
+def json_response(body: dict, headers: dict | None = None) -> Response:
+    """A requests response with a JSON body"""
+    response = Response()
+    response.status_code = 200
+    response.headers["Content-Type"] = "application/json"
+    response.headers.update(headers or {})
+    response._content = dumps(body).encode("utf-8")  # pylint: disable=protected-access
+    return response
+
+
+class MockClient(BuildClient):
+    """mock sdk build client that returns one build"""
+
+    def __init__(self):
+        super().__init__(base_url="https://dev.azure.com/Org")
+        self.requests = []
+
+    def _send(self, **request):  # pylint: disable=arguments-differ
+        """mock _send"""
+        self.requests.append(request)
+        project = request["route_values"]["project"]
+        return json_response(
+            {"count": 1, "value": [{"id": 1, "project": {"name": project}}]}
+        )
+
+
+class MockPagedClient(BuildClient):
+    """mock sdk build client with a build every day and pages of 10 builds
+
+    Only the http request is mocked, the sdk builds the request
+        and parses the response.
+    """
+
+    START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+    def __init__(self, days: int = 95):
+        super().__init__(base_url="https://dev.azure.com/Org")
+        self.finished = [MockPagedClient.START + timedelta(days=d) for d in range(days)]
+        self.calls = []
+        self.continued = Event()  # set when a page after the first is requested
+
+    def _send(self, **request):  # pylint: disable=arguments-differ
+        """mock _send, newest first"""
+        assert request["location_id"] == "0cd358e1-9217-4d94-8269-1c1ee6f93dcf"
+        query = {k: unquote(v) for k, v in request["query_parameters"].items()}
+        min_time, max_time = (
+            None if query.get(k) is None else datetime.fromisoformat(query[k])
+            for k in ("minTime", "maxTime")
+        )
+        token = query.get("continuationToken")
+        self.calls.append(
+            (request["route_values"]["project"], min_time, max_time, token)
+        )
+
+        if token is not None:
+            self.continued.set()
+
+        matches = [
+            d
+            for d, f in enumerate(self.finished)
+            if (min_time is None or f >= min_time)
+            and (max_time is None or f <= max_time)
+        ][::-1]
+        first = int(token or 0)
+        page = matches[first : first + 10]
+        more = first + 10 < len(matches)
+        return json_response(
+            {"count": len(page), "value": [{"id": d} for d in page]},
+            {"x-ms-continuationtoken": str(first + 10)} if more else None,
+        )
+
+
+def test_pages() -> None:
+    """test continuation tokens are followed"""
+    mock = MockPagedClient()
+    client = Client(mock)
+    pages = list(client.pages("project"))
+    assert [len(p) for p in pages] == [10] * 9 + [5], pages
+    assert [c[3] for c in mock.calls] == [None] + [str(t) for t in range(10, 100, 10)]
+    assert [b.id for b in client.list("project")] == list(range(94, -1, -1))
+
+
+def test_prefetch() -> None:
+    """test the next page is requested before the caller asks for it"""
+    mock = MockPagedClient(25)
+    pages = Client(mock).pages("project", prefetch=True)
+    assert [b.id for b in next(pages)] == list(range(24, 14, -1))
+    assert mock.continued.wait(5), mock.calls
+    assert [c[3] for c in mock.calls] == [None, "10"]
+    assert [len(p) for p in pages] == [10, 5]
+    assert len(mock.calls) == 3
+    assert len(list(Client(mock).pages("project", prefetch=False))) == 3
+
+
+def test_windows() -> None:
+    """test time windows are fetched concurrently and combined"""
+    mock = MockPagedClient()
+    start = MockPagedClient.START
+    end = start + timedelta(days=90)
+    assert Client.windows(start, end, 3) == [
+        (start + timedelta(days=60), end),
+        (start + timedelta(days=30), start + timedelta(days=60)),
+        (start, start + timedelta(days=30)),
+    ]
+    builds = Client(mock).list("project", start=start, end=end, windows=3, workers=3)
+    assert [b.id for b in builds] == list(range(90, -1, -1)), [b.id for b in builds]
+    assert {c[1:3] for c in mock.calls} == set(Client.windows(start, end, 3))
+    assert len(mock.calls) == 3 * 4, mock.calls
 
 
 def test_basic() -> None:
     """Test basic functionality"""
-    client = Client(MockClient())
+    mock = MockClient()
+    client = Client(mock)
     results = client.list(
         "project",
         [1, 2, 3],
-        datetime.now(),
-        datetime.now(),
+        datetime(2024, 1, 1, tzinfo=timezone.utc),
+        datetime(2024, 2, 1, tzinfo=timezone.utc),
         "completed",
-        "success",
+        "succeeded",
         ["id"],
         "main",
     )
     assert len(results) == 1, results
-    assert results[0].project == "project"
+    assert results[0].project.name == "project"
+    assert mock.requests[0]["query_parameters"] == {
+        "definitions": "1%2C2%2C3",
+        "minTime": "2024-01-01T00%3A00%3A00.000Z",
+        "maxTime": "2024-02-01T00%3A00%3A00.000Z",
+        "statusFilter": "completed",
+        "resultFilter": "succeeded",
+        "properties": "id",
+        "branchName": "main",
+    }, mock.requests
 
 
 if __name__ == "__main__":
+    test_windows()
+    test_prefetch()
+    test_pages()
     test_basic()
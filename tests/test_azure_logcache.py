@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+
+""" Test caching logs """
+
+from os.path import join
+from tempfile import TemporaryDirectory
+
+from devopsdriver.azdo.logcache import LogCache
+
+
+def test_basic() -> None:
+    """test storing and compressing logs"""
+    cache = LogCache()
+    text = "\n".join(f"line {i} of a repetitive log" for i in range(1000))
+    assert cache.get(LogCache.key("project", 12, 5)) is None
+    cache.put(LogCache.key("project", 12, 5), text)
+    assert cache.get("project|12|5") == text
+    assert cache.size() < len(text) / 10, cache.size()
+    cache.put("empty", "")
+    assert cache.get("empty") == ""
+    assert len(cache) == 2
+
+
+def test_eviction() -> None:
+    """test the least recently used logs are removed"""
+    with TemporaryDirectory() as directory:
+        path = join(directory, "logs.sqlite3")
+
+        with LogCache(path, max_bytes=700) as cache:
+            logs = {f"{i}": bytes(range(i, i + 200)).hex() for i in range(6)}
+
+            for key in ["0", "1", "2"]:
+                cache.put(key, logs[key])
+
+            assert cache.get("0") == logs["0"]
+            cache.put("3", logs["3"])
+            assert cache.size() <= 700, cache.size()
+            assert cache.get("1") is None
+            assert cache.get("0") == logs["0"]
+
+        with LogCache(path, max_bytes=700) as cache:
+            assert cache.get("3") == logs["3"]
+            cache.put("big", bytes(range(256)).hex() * 20)
+            assert cache.get("big") is not None and cache.get("3") == logs["3"]
+            assert cache.get("2") is None and cache.get("0") is None
+
+
+if __name__ == "__main__":
+    test_eviction()
+    test_basic()
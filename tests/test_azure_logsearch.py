@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+
+""" Test searching logs """
+
+from types import SimpleNamespace
+
+from devopsdriver.azdo.azureobject import AzureObject
+from devopsdriver.azdo.builds.build import Build
+from devopsdriver.azdo.logsearch import LogSearch
+from devopsdriver.azdo.pipeline import log
+from devopsdriver.azdo.pipeline.run import Run
+
+
+class MockTimeline:  # pylint: disable=too-few-public-methods
+    """mock timeline"""
+
+    def __init__(self, d: dict):
+        self.d = d
+
+    def as_dict(self) -> dict:
+        """mock as_dict"""
+        return self.d
+
+
+class MockBuildClient:
+    """mock build client with a job, two tasks and their logs"""
+
+    LOGS = {
+        1: ["starting job", "error: job failed"],
+        2: ["compiling", "warning: unused", "error: missing ;", "done"],
+        3: ["testing", "FAILED test_one", "Warning: slow"],
+    }
+
+    def __init__(self):
+        self.downloads = []
+
+    def get_build_log_lines(self, _, build_id, log_id) -> list[str]:
+        """mock get_build_log_lines"""
+        self.downloads.append((build_id, log_id))
+        return MockBuildClient.LOGS[log_id]
+
+    def get_build_log(self, _, build_id, log_id):
+        """mock get_build_log, one line at a time"""
+        self.downloads.append((build_id, log_id))
+        return (f"{l}\n".encode("utf-8") for l in MockBuildClient.LOGS[log_id])
+
+    def get_build_timeline(self, _, __):
+        """mock get_build_timeline"""
+        steps = [(None, "j", "Job", None, 1), ("j", "b", "Build", 1, 2)]
+        steps.append(("j", "t", "Test", 2, 3))
+        return SimpleNamespace(
+            records=[
+                MockTimeline(
+                    {"parent_id": p, "id": i, "name": n, "order": o, "log": {"id": l}}
+                )
+                for p, i, n, o, l in steps
+            ]
+        )
+
+
+class MockBuild(AzureObject):  # pylint: disable=too-few-public-methods
+    """mock azure build"""
+
+    def __init__(self, build_id: int):
+        self.build_id = build_id
+        super().__init__(self)
+
+    def as_dict(self) -> dict:
+        """mock as_dict"""
+        return {"project": {"name": "project"}, "id": self.build_id}
+
+
+class MockLog:  # pylint: disable=too-few-public-methods
+    """mock azure log object"""
+
+    def __init__(self, log_id: int):
+        self.id = log_id
+        self.url = f"https://dev.azure.com/Org/_apis/pipelines/5/runs/83/logs/{log_id}"
+        self.signed_content = SimpleNamespace(url=f"log {log_id}")
+
+    def as_dict(self):
+        """mock as_dict"""
+        return {"id": self.id}
+
+
+class MockPipelineClient:  # pylint: disable=too-few-public-methods
+    """mock azure pipelines client"""
+
+    def list_logs(self, *_, expand):
+        """mock list_logs"""
+        assert expand == "signedContent"
+        return SimpleNamespace(logs=[MockLog(4), MockLog(5)])
+
+
+class MockAzureRun:  # pylint: disable=too-few-public-methods
+    """Mock azure run object"""
+
+    id = 83
+
+    def as_dict(self):
+        """mock as_dict"""
+        return {"id": 83, "state": "completed"}
+
+
+def test_lines() -> None:
+    """test patterns are found and named"""
+    search = LogSearch({"error": r"^error:", "warning": r"warning:"})
+    lines = ["ok", "error: bad", "warning: meh", "error: warning: both"]
+    assert list(search.lines(lines)) == [
+        ("error", 2),
+        ("warning", 3),
+        ("error", 4),
+        ("warning", 4),
+    ]
+    assert search.any is not None
+    assert not list(LogSearch([]).lines(lines))
+
+
+def test_not_combined() -> None:
+    """test patterns that cannot be combined are checked one at a time"""
+    search = LogSearch([r"(\w)\1", r"(?P<x>a)b", r"(?P<x>c)d"])
+    assert search.any is None
+    assert list(search.lines(["xyz", "abba", "cd"])) == [
+        (r"(\w)\1", 2),
+        (r"(?P<x>a)b", 2),
+        (r"(?P<x>c)d", 3),
+    ]
+
+
+def test_build() -> None:
+    """test build step logs are searched with their step path"""
+    client = MockBuildClient()
+    search = LogSearch({"error": "error|FAILED", "warning": "warning"}, flags=2)
+    found = search.search_build(Build(client, MockBuild(12)))
+    assert [(m.pattern, m.path, m.line) for m in found] == [
+        ("error", ("Job",), 2),
+        ("warning", ("Job", "Build"), 2),
+        ("error", ("Job", "Build"), 3),
+        ("error", ("Job", "Test"), 2),
+        ("warning", ("Job", "Test"), 3),
+    ], found
+    assert sorted(client.downloads) == [(12, 1), (12, 2), (12, 3)]
+
+
+def test_search() -> None:
+    """test builds and runs are searched together, in order"""
+    log.GET_URL = lambda url, timeout: SimpleNamespace(
+        text="fine\nerror: run failed" if url == "log 5" else "fine"
+    )
+    client = MockBuildClient()
+    run = Run(MockPipelineClient(), "project", SimpleNamespace(id=5), MockAzureRun())
+    builds = [Build(client, MockBuild(b)) for b in range(20)]
+    search = LogSearch({"error": "^error"})
+    results = list(search.search(builds[:10] + [run] + builds[10:], workers=4))
+    assert [s for s, _ in results] == builds[:10] + [run] + builds[10:]
+    assert [repr(m) for m in results[10][1]] == ["error@5:2"]
+    assert all(
+        [repr(m) for m in f] == ["error@Job:2", "error@Job/Build:3"]
+        for s, f in results
+        if s is not run
+    )
+    assert len(client.downloads) == 60
+
+
+if __name__ == "__main__":
+    test_search()
+    test_build()
+    test_not_combined()
+    test_lines()
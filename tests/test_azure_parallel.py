@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+
+""" Test running requests concurrently """
+
+from threading import Lock
+from time import sleep
+
+from devopsdriver.azdo.parallel import ordered_map
+
+
+class Tracker:  # pylint: disable=too-few-public-methods
+    """tracks the most calls in flight at once"""
+
+    def __init__(self):
+        self.lock = Lock()
+        self.running = 0
+        self.most = 0
+
+    def __call__(self, value: int) -> int:
+        with self.lock:
+            self.running += 1
+            self.most = max(self.most, self.running)
+
+        sleep(0.001 * (value % 3))
+
+        with self.lock:
+            self.running -= 1
+
+        return value * 2
+
+
+def test_ordered() -> None:
+    """test results are in order and concurrency is bounded"""
+    tracker = Tracker()
+    results = list(ordered_map(tracker, iter(range(100)), workers=4))
+    assert results == [v * 2 for v in range(100)], results
+    assert 1 <= tracker.most <= 4, tracker.most
+    assert not list(ordered_map(tracker, []))
+
+
+def test_error() -> None:
+    """test errors are raised in the caller"""
+
+    def fail(value: int) -> int:
+        if value == 5:
+            raise ValueError(value)
+
+        return value
+
+    results = []
+
+    try:
+        for result in ordered_map(fail, range(10), workers=2):
+            results.append(result)
+
+        raise AssertionError("should have raised")
+
+    except ValueError:
+        assert results == [0, 1, 2, 3, 4], results
+
+
+if __name__ == "__main__":
+    test_error()
+    test_ordered()
@@ -6,17 +6,19 @@ from types import SimpleNamespace
 
 from devopsdriver.azdo.pipeline.run import Run
 from devopsdriver.azdo.pipeline import log
+from devopsdriver.azdo.logcache import LogCache
 
 
 class MockAzureRun:  # pylint: disable=too-few-public-methods
     """Mock azure run object"""
 
-    def __init__(self, run_id):
+    def __init__(self, run_id, state=None):
         self.id = run_id
+        self.state = state
 
     def as_dict(self):
         """mock as_dict"""
-        return {"id": 48}
+        return {"id": 48, "state": self.state}
 
 
 class MockLog:  # pylint: disable=too-few-public-methods
@@ -24,6 +26,7 @@ class MockLog:  # pylint: disable=too-few-public-methods
 
     def __init__(self, text):
         self.text = text
+        self.url = f"https://dev.azure.com/Org/_apis/pipelines/5/runs/83/logs/{text}"
         self.signed_content = SimpleNamespace(url=SimpleNamespace(text="some dumb url"))
 
     def as_dict(self):
@@ -64,5 +67,34 @@ def test_basic() -> None:
     assert len(logs) == 2, logs
 
 
+def test_cached() -> None:
+    """test logs of completed runs are only downloaded once"""
+    downloads = []
+    log.GET_URL = lambda x, timeout: downloads.append(x) or SimpleNamespace(
+        text="Forbidden", ok=False
+    )
+    cache = LogCache()
+    run = Run(
+        MockPipelineClient(), "project", MockPipeline(5), MockAzureRun(83, "completed")
+    )
+    assert [l.text for l in run.get_logs(cache)] == ["Forbidden", "Forbidden"]
+    assert len(downloads) == 2 and not cache
+    downloads.clear()
+    log.GET_URL = lambda x, timeout: downloads.append(x) or SimpleNamespace(
+        text="text", ok=True
+    )
+    running = Run(MockPipelineClient(), "project", MockPipeline(5), MockAzureRun(83))
+    assert [l.text for l in running.get_logs(cache)] == ["text", "text"]
+    assert len(downloads) == 2 and not cache
+    run = Run(
+        MockPipelineClient(), "project", MockPipeline(5), MockAzureRun(83, "completed")
+    )
+    assert [l.text for l in run.get_logs(cache)] == ["text", "text"]
+    assert len(downloads) == 4 and len(cache) == 2
+    assert [l.text for l in run.get_logs(cache)] == ["text", "text"]
+    assert len(downloads) == 4, downloads
+
+
 if __name__ == "__main__":
+    test_cached()
     test_basic()
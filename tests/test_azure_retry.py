@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+
+""" Test retrying throttled requests """
+
+from json import dumps
+from types import SimpleNamespace
+
+from azure.devops.exceptions import AzureDevOpsClientRequestError
+from azure.devops.v7_1.build import BuildClient
+from azure.devops.v7_1.work_item_tracking import WorkItemTrackingClient
+from msrest.exceptions import HttpOperationError
+from requests import Response
+
+from devopsdriver.azdo import retry
+
+
+class MockResponse:  # pylint: disable=too-few-public-methods
+    """mock requests response"""
+
+    def __init__(self, status_code: int, headers: dict):
+        self.status_code = status_code
+        self.headers = headers
+        self.reason = "mock"
+
+    def raise_for_status(self) -> None:
+        """mock raise_for_status"""
+
+    def json(self) -> dict:
+        """mock json"""
+        return {}
+
+
+class Flaky:  # pylint: disable=too-few-public-methods
+    """fails with the given errors before succeeding"""
+
+    def __init__(self, *errors: Exception):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self, value: int) -> int:
+        self.calls += 1
+
+        if self.errors:
+            raise self.errors.pop(0)
+
+        return value
+
+
+def test_status_code() -> None:
+    """test finding the status code of errors"""
+    retry.LAST.status = retry.LAST.retry_after = None
+    throttled = AzureDevOpsClientRequestError("Operation returned a 429 status code.")
+    assert retry.status_code(throttled) == 429
+    assert retry.status_code(AzureDevOpsClientRequestError("nope")) is None
+    error = HttpOperationError(None, MockResponse(429, {"Retry-After": "7"}))
+    assert retry.status_code(error) == 429
+    assert retry.retry_after(error) == 7.0
+    assert retry.retry_after(throttled) is None
+    error = HttpOperationError(None, MockResponse(429, {"Retry-After": "soon"}))
+    assert retry.retry_after(error) is None
+
+
+def test_retry() -> None:
+    """test retrying with backoff and Retry-After"""
+    delays = []
+    flaky = Flaky(
+        AzureDevOpsClientRequestError("Operation returned a 429 status code."),
+        HttpOperationError(None, MockResponse(429, {"Retry-After": "3"})),
+        AzureDevOpsClientRequestError("Operation returned a 429 status code."),
+    )
+    sleep, retry.SLEEP = retry.SLEEP, delays.append
+
+    try:
+        assert retry.call(flaky, 5, backoff=0.5) == 5
+
+    finally:
+        retry.SLEEP = sleep
+
+    assert flaky.calls == 4, flaky.calls
+    assert delays == [0.5, 3.0, 2.0], delays
+
+
+def test_no_retry() -> None:
+    """test errors that should not be retried or run out of retries"""
+    for status in (404, 503):  # msrest already retries 503
+        flaky = Flaky(
+            AzureDevOpsClientRequestError(f"Operation returned a {status} status code.")
+        )
+
+        try:
+            retry.call(flaky, 5)
+            raise AssertionError(f"{status} should not be retried")
+
+        except AzureDevOpsClientRequestError:
+            assert flaky.calls == 1, flaky.calls
+
+    flaky = Flaky(
+        *[AzureDevOpsClientRequestError("Operation returned a 429 status code.")] * 3
+    )
+    sleep, retry.SLEEP = retry.SLEEP, lambda s: s
+
+    try:
+        retry.call(flaky, 5, retries=2)
+        raise AssertionError("should have run out of retries")
+
+    except AzureDevOpsClientRequestError:
+        assert flaky.calls == 3, flaky.calls
+
+    finally:
+        retry.SLEEP = sleep
+
+    assert retry.call(SimpleNamespace(value=3).__getattribute__, "value") == 3
+
+
+def test_watch() -> None:
+    """test Retry-After is found for SDK errors, which have no response"""
+    client = BuildClient(base_url="https://dev.azure.com/Org")
+    assert retry.watch(retry.watch(client)) is client
+    assert client.config.hooks == [retry.remember]
+    assert retry.watch(SimpleNamespace()) is not None
+    responses = [
+        MockResponse(429, {"Retry-After": "4"}),
+        MockResponse(429, {}),
+        MockResponse(200, {"Retry-After": "9"}),
+    ]
+
+    def request() -> int:
+        response = responses.pop(0)
+
+        for hook in client.config.hooks:
+            hook(response)
+
+        if response.status_code == 429:
+            raise AzureDevOpsClientRequestError("Operation returned a 429 status code.")
+
+        return response.status_code
+
+    delays = []
+    sleep, retry.SLEEP = retry.SLEEP, delays.append
+
+    try:
+        assert retry.call(request, backoff=0.5) == 200
+
+    finally:
+        retry.SLEEP = sleep
+
+    assert delays == [4.0, 1.0], delays
+    assert retry.retry_after(AzureDevOpsClientRequestError("stale")) is None
+
+
+def test_service_error() -> None:
+    """test a throttled request with a JSON error, which has no status in it"""
+    client = WorkItemTrackingClient(base_url="https://dev.azure.com/Org")
+    retry.watch(client)
+    attempts = []
+
+    def request() -> str:
+        attempts.append(len(attempts))
+
+        if len(attempts) > 1:
+            return "done"
+
+        response = Response()
+        response.status_code = 429
+        response.headers["Content-Type"] = "application/json"
+        response.headers["Retry-After"] = "2"
+        response._content = dumps(  # pylint: disable=protected-access
+            {
+                "message": "TF400733: The request has been canceled",
+                "typeKey": "RequestCanceledException",
+            }
+        ).encode("utf-8")
+
+        for hook in client.config.hooks:
+            hook(response)
+
+        # pylint: disable-next=protected-access
+        client._handle_error(SimpleNamespace(url="https://dev.azure.com"), response)
+        return "not raised"
+
+    delays = []
+    sleep, retry.SLEEP = retry.SLEEP, delays.append
+
+    try:
+        assert retry.call(request) == "done"
+
+    finally:
+        retry.SLEEP = sleep
+
+    assert delays == [2.0], delays
+
+
+if __name__ == "__main__":
+    test_service_error()
+    test_watch()
+    test_no_retry()
+    test_retry()
+    test_status_code()
@@ -265,6 +265,7 @@ def test_comparison() -> None:
     assert Timestamp(time1) != time2
     assert Timestamp(time2) != Timestamp(time1)
     assert Timestamp(time1) != 5
+    assert len({Timestamp(time1), Timestamp(time1), time1, Timestamp(time2)}) == 2
 
     try:
         assert Timestamp(time2) < 5
@@ -302,7 +303,107 @@ def test_math() -> None:
         assert "Timestamp" in str(error) and "int" in str(error), error
 
 
+def strptime_parse(timestamp: str) -> datetime:
+    """The way timestamps used to be parsed"""
+    whole, fractional = timestamp.rsplit(".", 1)
+    result = datetime.strptime(whole, Timestamp.DATE_FORMAT)
+    fractional_seconds = float(f"0.{fractional[:-1].ljust(3, '0')}")
+    return result.replace(
+        microsecond=int(fractional_seconds * Timestamp.US_PER_SEC)
+    ).replace(tzinfo=timezone.utc)
+
+
+def test_parse() -> None:
+    """test validating and parsing in one pass"""
+    for timestamp_string in TEST_TIMESTAMPS:
+        assert Timestamp.parse(timestamp_string).value == strptime_parse(
+            timestamp_string
+        ), timestamp_string
+
+    assert Timestamp.parse("2024-03-25T23:53:38.503126Z").value.microsecond == 503126
+    assert Timestamp.parse("2024-03-25T23:53:38.5031267Z").value.microsecond == 503126
+    whole = Timestamp.from_microseconds(1704110400000000)
+    assert str(whole) == "2024-01-01T12:00:00Z", str(whole)
+    assert Timestamp(str(whole)) == whole and Timestamp.is_timestamp(str(whole))
+    assert Timestamp.parse("2024-01-01T12:00:00Z") == whole
+    not_timestamps = [
+        5,
+        None,
+        "",
+        "2023-11-16T03:12:32.alphaZ",
+        "2023-11-16T03:12:32.94",
+        "2023-11-16T03:12:32ZZ",
+        "2023-11-16T03:12:32:Z",
+        "2023-13-16T03:12:32.94Z",
+        "2023-11-16 03:12:32.94Z",
+        "2023-11-16T03:12:3x.94Z",
+        "2023-11-1-T03:12:32.94Z",
+        "2023-11-16T03:12:32.9x4Z",
+        "2023-11-16T03:12:32.٣Z",
+    ]
+
+    for value in not_timestamps:
+        assert Timestamp.parse(value) is None, value
+        assert not Timestamp.is_timestamp(value), value
+
+    try:
+        Timestamp("2023-11-16T03:12:32ZZ")
+        assert False, "ValueError not raised"
+
+    except ValueError as error:
+        assert "2023-11-16T03:12:32ZZ" in str(error), error
+
+
+def test_parse_many() -> None:
+    """test parsing many timestamps without building datetimes"""
+    values = (TEST_TIMESTAMPS + ["not a timestamp", 5]) * 50
+    parsed = Timestamp.parse_many(values)
+    # pylint: disable-next=protected-access
+    assert all(p is None or p._value is None for p in parsed)
+    expected = [
+        strptime_parse(v) if isinstance(v, str) and "." in v else None for v in values
+    ]
+    assert [None if p is None else p.value for p in parsed] == expected
+
+
+def test_microseconds() -> None:
+    """test the integer representation"""
+    stamps = [Timestamp(t) for t in TEST_TIMESTAMPS]
+    assert not hasattr(stamps[0], "__dict__")
+    assert all(Timestamp.from_microseconds(s.to_microseconds()) == s for s in stamps)
+    assert Timestamp.from_microseconds(0).value == datetime(
+        1970, 1, 1, tzinfo=timezone.utc
+    )
+    assert Timestamp("1969-12-31T23:59:59.5Z").to_microseconds() == -500000
+    assert sorted(reversed(stamps)) == sorted(stamps, key=lambda s: s.value)
+    assert all(hash(s) == hash(s.value) for s in stamps)
+    naive = Timestamp(datetime(2024, 1, 1, 12))
+    same = Timestamp.from_microseconds(naive.to_microseconds())
+    assert naive == same and hash(naive) == hash(same)
+    assert (naive + timedelta(hours=1)).value == datetime(2024, 1, 1, 13)
+    assert (naive + timedelta(0)).to_string() == naive.to_string()
+    assert hash(Timestamp(stamps[0].value)) == hash(stamps[0])
+    local = datetime(2024, 2, 5, 3, 13, 24)
+    assert Timestamp(local).value is local
+    assert hash(Timestamp(local)) == hash(local.astimezone(timezone.utc))
+    assert stamps[1] - stamps[0] == stamps[1].value - stamps[0].value
+    assert (stamps[0] + timedelta(hours=1)).value == stamps[0].value + timedelta(
+        hours=1
+    )
+    assert Timestamp.parse("2023-11-16T24:00:00.0Z") is None
+    assert Timestamp.parse("2023-02-29T03:12:32.94Z") is None
+
+    try:
+        assert Timestamp([]) is None
+
+    except TypeError as error:
+        assert "list" in str(error), error
+
+
 if __name__ == "__main__":
+    test_microseconds()
+    test_parse_many()
+    test_parse()
     test_math()
     test_now()
     test_comparison()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+
+""" Test caching query results """
+
+from datetime import datetime, timezone
+from os.path import join
+from tempfile import TemporaryDirectory
+
+from azure.devops.v7_1.work_item_tracking.models import WorkItemQueryResult
+from azure.devops.v7_1.work_item_tracking.models import WorkItemReference
+
+from devopsdriver.azdo.parallel import ordered_map
+from devopsdriver.azdo.workitem import cache
+from devopsdriver.azdo.workitem.cache import QueryCache
+from devopsdriver.azdo.workitem.client import Client
+from devopsdriver.azdo import Wiql, Equal
+from devopsdriver.azdo.workitem.wiql import Compare
+
+
+class MockClock:  # pylint: disable=too-few-public-methods
+    """a clock that only moves when told to"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class MockClient:  # pylint: disable=too-few-public-methods
+    """fake a work item client that counts queries"""
+
+    def __init__(self):
+        self.queries = []
+        self.changed = False
+
+    def query_by_wiql(self, wiql, team_context, time_precision, top):
+        """mock out the query_by_wiql"""
+        self.queries.append((wiql.query, team_context, time_precision, top))
+        ids = [] if "[System.ChangedDate] >" in wiql.query else [0, 1, 2]
+        ids = [7] if self.changed else ids
+        return WorkItemQueryResult(
+            as_of=datetime(2024, 2, 1, 15, 12, 12, 277000, tzinfo=timezone.utc),
+            work_items=[WorkItemReference(id=i) for i in ids],
+        )
+
+
+def test_key() -> None:
+    """test normalizing queries"""
+    query = str(Wiql().where(Equal("State", "New  Item")))
+    assert QueryCache.key(query, None, None) == QueryCache.key(
+        query.lower().replace(" [", "\n   [").replace("new  item", "New  Item"),
+        None,
+        None,
+    )
+    assert QueryCache.key(query, None, None) != QueryCache.key(
+        query.replace("New  Item", "New Item"), None, None
+    )
+    assert QueryCache.key(query, None, None) != QueryCache.key(query, 5, None)
+    assert QueryCache.key(query, None, None) != QueryCache.key(query, None, True)
+
+
+def test_cache() -> None:
+    """test reusing, checking, and refetching query results"""
+    clock = MockClock()
+    time, cache.TIME = cache.TIME, clock
+
+    try:
+        mock = MockClient()
+        client = Client(mock, QueryCache(ttl=60, max_age=3600))
+        query = Wiql().where(Equal("State", "New"))
+        assert client.find_ids(query) == [0, 1, 2]
+        assert client.find_ids(query) == [0, 1, 2]
+        assert len(mock.queries) == 1, mock.queries
+
+        clock.now += 61
+        assert client.find_ids(query) == [0, 1, 2]
+        assert mock.queries[-1] == (
+            'SELECT [System.Id] FROM WorkItems WHERE (([System.State] = "New") '
+            + "OR [System.Id] IN (0, 1, 2)) "
+            + 'AND [System.ChangedDate] > "2024-02-01T15:12:12.277000Z"',
+            None,
+            True,
+            1,
+        ), mock.queries[-1]
+        assert len(mock.queries) == 2, mock.queries
+        assert client.find_ids(query) == [0, 1, 2]
+        assert len(mock.queries) == 2, mock.queries
+
+        clock.now += 61
+        mock.changed = True
+        assert client.find_ids(query) == [7]
+        assert len(mock.queries) == 4, mock.queries
+
+        mock.changed = False
+        assert client.find_ids(query, top=5) == [0, 1, 2]
+        clock.now += 3601
+        assert client.find_ids(query, top=5) == [0, 1, 2]
+        assert len(mock.queries) == 6, mock.queries
+        assert client.query(query, team_context="team").work_items
+        assert client.query(query, team_context="team").work_items
+        assert len(mock.queries) == 8, mock.queries
+        assert client.find_ids(str(query)) == [0, 1, 2]
+        clock.now += 61
+        assert client.find_ids(str(query)) == [0, 1, 2]
+        assert len(mock.queries) == 10, mock.queries
+
+    finally:
+        cache.TIME = time
+
+
+def test_macros() -> None:
+    """test queries with macros are run again after ttl"""
+    assert QueryCache.has_macros("SELECT [System.Id] FROM WorkItems WHERE a > @Today")
+    assert not QueryCache.has_macros('SELECT [System.Id] FROM WorkItems WHERE a = "@x"')
+    clock = MockClock()
+    time, cache.TIME = cache.TIME, clock
+
+    try:
+        mock = MockClient()
+        client = Client(mock, QueryCache(ttl=60, max_age=3600))
+        query = Wiql().where(Compare("TargetDate", "@Today - 1", "<", True))
+        assert client.find_ids(query) == [0, 1, 2]
+        assert client.find_ids(query) == [0, 1, 2]
+        assert len(mock.queries) == 1, mock.queries
+        clock.now += 61
+        assert client.find_ids(query) == [0, 1, 2]
+        assert len(mock.queries) == 2, mock.queries
+        assert "@Today - 1" in mock.queries[-1][0] and mock.queries[-1][3] is None
+
+    finally:
+        cache.TIME = time
+
+
+def test_persistence() -> None:
+    """test results are kept on disk"""
+    time, cache.TIME = cache.TIME, MockClock()
+
+    try:
+
+        with TemporaryDirectory() as directory:
+            path = join(directory, "queries.sqlite3")
+
+            with QueryCache(path) as first:
+                Client(MockClient(), first).find_ids(Wiql())
+
+            mock = MockClient()
+
+            with QueryCache(path) as second:
+                assert Client(mock, second).find_ids(Wiql()) == [0, 1, 2]
+
+            assert not mock.queries, mock.queries
+
+    finally:
+        cache.TIME = time
+
+
+def test_threads() -> None:
+    """test the cache is shared by concurrent queries"""
+    query_cache = QueryCache()
+    result = WorkItemQueryResult(work_items=[WorkItemReference(id=5)])
+
+    def use(index: int) -> int:
+        key = QueryCache.key(f"SELECT [System.Id] FROM WorkItems {index}", None, None)
+        query_cache.put(key, result)
+        query_cache.touch(key)
+        return query_cache.get(key)[0].work_items[0].id
+
+    assert list(ordered_map(use, range(2000), workers=16)) == [5] * 2000
+
+
+if __name__ == "__main__":
+    test_macros()
+    test_threads()
+    test_persistence()
+    test_cache()
+    test_key()
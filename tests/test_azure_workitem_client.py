@@ -2,36 +2,150 @@
 
 """ Module Doc """
 
+from re import search
 from types import SimpleNamespace
 
+from azure.devops.exceptions import AzureDevOpsClientRequestError
+
 from devopsdriver.azdo.workitem.client import Client
-from devopsdriver.azdo import Wiql, Equal
+from devopsdriver.azdo import retry
+from devopsdriver.azdo import Wiql, Equal, In, NotIn, And, Group
+
+
+class MockWorkItem:  # pylint: disable=too-few-public-methods
+    """fake an azure work item"""
+
+    def __init__(self, data: dict):
+        self.data = data
+
+    def as_dict(self, key_transformer=None) -> dict:
+        """mock out as_dict"""
+        if key_transformer is None:
+            return self.data
+
+        return dict(key_transformer(k, {}, v) for k, v in self.data.items())
 
 
 class MockClient:  # pylint: disable=too-few-public-methods
     """fake an azure work item client, at least what we use"""
 
-    def __init__(self):
+    def __init__(self, count: int = 20):
         self.query = None
+        self.count = count
+        self.requests = 0
+        self.throttled = set()
 
     def query_by_wiql(self, wiql, team_context, time_precision, top) -> SimpleNamespace:
         """mock out the query_by_wiql"""
         self.query = wiql.query
         assert team_context is None, team_context
         assert time_precision is None, time_precision
-        assert top is None, top
+        assert top in (None, Client.MAX_RESULTS), top
         return SimpleNamespace(
-            work_items=[SimpleNamespace(id=number) for number in range(0, 20)]
+            work_items=[SimpleNamespace(id=number) for number in range(0, self.count)]
         )
 
+    def get_work_items_batch(self, work_item_get_request, project):
+        """Mock out get_work_items_batch"""
+        assert project is None, project
+        assert len(work_item_get_request.ids) <= Client.BATCH_SIZE
+        assert work_item_get_request.fields in (None, ["System.Id", "System.State"])
+        self.requests += 1
+        return [
+            MockWorkItem({"id": i, "fields": {"System.Id": i}})
+            for i in work_item_get_request.ids
+            if i % 1000 != 999  # pretend some items were deleted
+        ] + [None]
+
     def get_revisions(self, wi_id, project, top, skip, expand):
         """Mock out get_revisions"""
         assert project is None, project
         assert top is None, top
         assert skip is None, skip
         assert expand is None, expand
-        assert 0 <= wi_id < 20
-        return []
+        assert 0 <= wi_id < self.count
+
+        if wi_id % 7 == 3 and wi_id not in self.throttled:
+            self.throttled.add(wi_id)
+            raise AzureDevOpsClientRequestError("Operation returned a 429 status code.")
+
+        return [
+            MockWorkItem(
+                {
+                    "id": wi_id,
+                    "rev": r,
+                    "fields": {"System.State": "New", "System.Title": f"{wi_id}"},
+                }
+            )
+            for r in range(1, wi_id % 4)
+        ]
+
+
+class MockPagingClient:  # pylint: disable=too-few-public-methods
+    """fake a work item client that honors top and [System.Id] >"""
+
+    def __init__(self, count: int):
+        self.count = count
+        self.queries = []
+
+    def query_by_wiql(self, wiql, team_context, time_precision, top) -> SimpleNamespace:
+        """mock out the query_by_wiql"""
+        assert team_context is None and time_precision is None, wiql
+        self.queries.append((wiql.query, top))
+        after = search(r"\[System.Id\] > (\d+)", wiql.query)
+        start = int(after.group(1)) + 1 if after else 0
+        return SimpleNamespace(
+            work_items=[SimpleNamespace(id=i) for i in range(start, self.count)][:top]
+        )
+
+    def get_revisions(self, wi_id, project, top, skip, expand):
+        """Mock out get_revisions"""
+        assert project is None and top is None and skip is None and expand is None
+        return [MockWorkItem({"id": wi_id, "rev": 1})]
+
+
+class MockRangeClient:  # pylint: disable=too-few-public-methods
+    """fake a work item client that honors top, order, and [System.Id] ranges"""
+
+    def __init__(self, ids: list[int]):
+        self.ids = ids
+        self.queries = []
+
+    def query_by_wiql(self, wiql, team_context, time_precision, top) -> SimpleNamespace:
+        """mock out the query_by_wiql"""
+        assert team_context is None and time_precision is None, wiql
+        self.queries.append(wiql.query)
+        low = search(r"\[System.Id\] >= (\d+)", wiql.query)
+        high = search(r"\[System.Id\] < (\d+)", wiql.query)
+        ids = [
+            i
+            for i in self.ids
+            if (not low or i >= int(low.group(1)))
+            and (not high or i < int(high.group(1)))
+        ]
+        ids = list(reversed(ids)) if wiql.query.endswith("DESC") else ids
+        assert top is not None, "queries over MAX_RESULTS fail without top"
+        return SimpleNamespace(work_items=[SimpleNamespace(id=i) for i in ids][:top])
+
+
+class MockListClient:  # pylint: disable=too-few-public-methods
+    """fake a work item client that honors [System.Id] IN and NOT IN"""
+
+    def __init__(self, count: int):
+        self.count = count
+        self.queries = []
+
+    def query_by_wiql(self, wiql, team_context, time_precision, top) -> SimpleNamespace:
+        """mock out the query_by_wiql"""
+        assert team_context is None and time_precision is None, wiql
+        assert len(wiql.query) <= Client.MAX_QUERY_LENGTH, wiql.query
+        self.queries.append(wiql.query)
+        listed = search(r"\[System.Id\] (NOT IN|IN) \(([^)]*)\)", wiql.query)
+        values = {int(v) for v in listed.group(2).split(", ")}
+        ids = [
+            i for i in range(self.count) if (i in values) == (listed.group(1) == "IN")
+        ]
+        return SimpleNamespace(work_items=[SimpleNamespace(id=i) for i in ids][:top])
 
 
 def test_basic() -> None:
@@ -44,18 +158,148 @@ def test_basic() -> None:
 def test_history() -> None:
     """test history"""
     client = Client(MockClient())
-    history = client.get_history(2)
+    history = client.get_history(4)
     assert not history
 
 
 def test_find() -> None:
     """Tests the find with the devops azure WorkItem"""
     client = Client(MockClient())
-    found = client.find(Wiql().select("State").where(Equal("State", "New")))
+    query = Wiql().select("State").where(Equal("State", "New"))
+    found = client.find(query)
     assert len(found) == 20
+    assert found[2][0].state == "New", found[2][0]
+    assert found[2][0].title is None, found[2][0]
+    assert query.fields() == ["System.State"], query.fields()
+    found = client.find(Wiql().where(Equal("State", "New")))
+    assert found[2][0].title == "2", found[2][0]
+
+
+def test_histories() -> None:
+    """Tests getting histories concurrently with retries"""
+    mock = MockClient(500)
+    sleep, retry.SLEEP = retry.SLEEP, lambda s: s
+
+    try:
+        histories = Client(mock).get_histories(list(range(500)), workers=16)
+
+    finally:
+        retry.SLEEP = sleep
+
+    assert len(histories) == 500, len(histories)
+    assert mock.throttled == {i for i in range(500) if i % 7 == 3}
+    assert [len(h) for h in histories] == [max(0, i % 4 - 1) for i in range(500)]
+    assert all(e.id == i for i, h in enumerate(histories) for e in h)
+
+
+def test_iter_ids() -> None:
+    """Tests paging past the query result limit"""
+    mock = MockPagingClient(25)
+    client = Client(mock)
+    query = Wiql().where(Equal("State", "New"))
+    pages = list(client.iter_ids(query, page=10))
+    assert pages == [list(range(0, 10)), list(range(10, 20)), list(range(20, 25))]
+    assert str(query) == str(Wiql().where(Equal("State", "New"))), str(query)
+    assert mock.queries[-1] == (
+        "SELECT [System.Id] FROM WorkItems "
+        + 'WHERE ([System.State] = "New") AND [System.Id] > 19 '
+        + "ORDER BY [System.Id] ASC",
+        10,
+    ), mock.queries[-1]
+    assert len(mock.queries) == 4, mock.queries
+    assert list(client.iter_ids(Wiql(), top=15, page=10)) == [
+        list(range(0, 10)),
+        list(range(10, 15)),
+    ]
+    assert list(client.iter_ids(Wiql(), top=5, page=10)) == [list(range(0, 5))]
+    assert list(client.iter_ids(Wiql(), page=5)) == [
+        list(range(s, s + 5)) for s in range(0, 25, 5)
+    ]
+    assert list(client.iter_ids(str(Wiql()), page=10)) == [list(range(0, 10))]
+
+
+def test_partitions() -> None:
+    """Tests splitting a query into [System.Id] ranges"""
+    ids = list(range(100, 130)) + list(range(500, 537)) + [2000]
+    mock = MockRangeClient(ids)
+    client = Client(mock)
+    Client.MAX_RESULTS, limit = 10, Client.MAX_RESULTS
+    try:
+        query = Wiql().where(Equal("State", "New"))
+        assert client.find_ids(query, partitions=4, workers=3) == ids
+        assert client.find_ids(query, top=35, partitions=2) == ids[:35]
+        assert '([System.State] = "New") AND [System.Id] >= 100' in mock.queries[2]
+        assert client.find_ids(Wiql(), partitions=3) == ids
+        assert Client(MockRangeClient([])).find_ids(Wiql(), partitions=3) == []
+    finally:
+        Client.MAX_RESULTS = limit
+
+
+def test_iter_find() -> None:
+    """Tests streaming histories"""
+    client = Client(MockPagingClient(45))
+    Client.MAX_RESULTS, limit = 10, Client.MAX_RESULTS
+    try:
+        found = client.iter_find(Wiql(), workers=3)
+        assert next(found)[0].id == 0
+        assert [h[0].id for h in found] == list(range(1, 45))
+        assert len(client.find(Wiql(), top=12)) == 12
+    finally:
+        Client.MAX_RESULTS = limit
+
+
+def test_find_current() -> None:
+    """Tests finding only the current state of items in batches"""
+    mock = MockClient(10000)
+    client = Client(mock)
+    found = client.find(Wiql().where(Equal("State", "New")), history=False)
+    assert mock.requests == 10000 // Client.BATCH_SIZE, mock.requests
+    assert len(found) == 9990, len(found)
+    assert all(len(h) == 1 for h in found)
+    assert found[5][0].id == 5, found[5][0].id
+    assert len(client.find(Wiql().select("Id", "State"), history=False)) == 9990
+
+
+def test_chunks() -> None:
+    """Tests splitting large IN and NOT IN lists into several queries"""
+    mock = MockListClient(1000)
+    client = Client(mock)
+    Client.MAX_QUERY_LENGTH, limit = 300, Client.MAX_QUERY_LENGTH
+    try:
+        wanted = list(range(900, 1100, 3)) + list(range(0, 100, 2))
+        assert client.find_ids(Wiql().where(In("Id", *wanted))) == [
+            i for i in wanted if i < 1000
+        ]
+        assert len(mock.queries) == 3, mock.queries
+        mock.queries.clear()
+        assert client.find_ids(Wiql().where(In("Id", *wanted)), top=10) == wanted[:10]
+        assert client.find_ids(
+            Wiql().where(Group(And(Equal("State", "New"), In("Id", *wanted))))
+        ) == [i for i in wanted if i < 1000]
+        assert all('[System.State] = "New" AND' in q for q in mock.queries[-3:])
+        unwanted = list(range(0, 1000, 4)) + list(range(1, 1000, 4))
+        assert client.find_ids(Wiql().where(NotIn("Id", *unwanted)), top=5) == [
+            2,
+            3,
+            6,
+            7,
+            10,
+        ]
+        assert client.find_ids(Wiql().where(NotIn("Id", *unwanted))) == [
+            i for i in range(1000) if i % 4 in (2, 3)
+        ]
+        assert client.find_ids(Wiql().where(In("Id", 5, 6))) == [5, 6]
+    finally:
+        Client.MAX_QUERY_LENGTH = limit
 
 
 if __name__ == "__main__":
+    test_chunks()
+    test_find_current()
+    test_iter_find()
+    test_partitions()
+    test_iter_ids()
+    test_histories()
     test_find()
     test_history()
     test_basic()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+
+""" Test work item hierarchies """
+
+from types import SimpleNamespace
+
+from azure.devops.v7_1.work_item_tracking.models import WorkItem, WorkItemRelation
+
+from devopsdriver.azdo import AzureObject, Wiql
+from devopsdriver.azdo.workitem.client import Client
+from devopsdriver.azdo.workitem.graph import Graph
+
+
+URL = "https://dev.azure.com/company/_apis/wit/workItems"
+
+
+def children(wi_id: int) -> list[int]:
+    """Epics are 1-9, each has 10 features, each feature has 10 stories"""
+    return [wi_id * 10 + c for c in range(10)] if wi_id < 100 else []
+
+
+class MockClient:  # pylint: disable=too-few-public-methods
+    """fake a work item client with a three level hierarchy"""
+
+    def __init__(self):
+        self.requests = []
+
+    def get_work_items_batch(self, work_item_get_request, project):
+        """Mock out get_work_items_batch"""
+        assert project is None, project
+        assert len(work_item_get_request.ids) <= Client.BATCH_SIZE
+        self.requests.append(list(work_item_get_request.ids))
+        expand = work_item_get_request.expand == "Relations"
+        return [
+            WorkItem(
+                id=i,
+                fields={"System.Title": f"Item {i}"},
+                relations=(
+                    [
+                        WorkItemRelation(rel=Graph.CHILD, url=f"{URL}/{c}")
+                        for c in children(i)
+                    ]
+                    + [WorkItemRelation(rel="Related", url=f"{URL}/1")]
+                    + [WorkItemRelation(rel="AttachedFile", url="https://file/1")]
+                    + [WorkItemRelation(rel=Graph.PARENT, url=f"{URL}/{i // 10}")]
+                    if expand
+                    else None
+                ),
+            )
+            for i in work_item_get_request.ids
+        ]
+
+    def query_by_wiql(self, wiql, team_context, time_precision, top) -> SimpleNamespace:
+        """mock out the query_by_wiql for a tree query"""
+        assert "WorkItemLinks" in wiql.query, wiql.query
+        assert team_context is None and time_precision is None and top is None
+        reference = SimpleNamespace
+        return SimpleNamespace(
+            work_items=None,
+            work_item_relations=[
+                SimpleNamespace(rel=None, source=None, target=reference(id=1)),
+                SimpleNamespace(
+                    rel=Graph.CHILD, source=reference(id=1), target=reference(id=10)
+                ),
+                SimpleNamespace(
+                    rel=Graph.CHILD, source=reference(id=1), target=reference(id=11)
+                ),
+                SimpleNamespace(
+                    rel=Graph.CHILD, source=reference(id=11), target=reference(id=110)
+                ),
+            ],
+        )
+
+
+def test_graph() -> None:
+    """test building a graph"""
+    graph = Graph()
+    graph.add(AzureObject(WorkItem(id=1, fields={"System.Title": "Epic"})))
+    graph.add(AzureObject(WorkItem(id=2, fields={"System.Title": "Feature"})))
+    graph.link(Graph.CHILD, 1, 2)
+    graph.link(Graph.PARENT, 3, 2)
+    graph.link(Graph.CHILD, 2, 3)
+    graph.link("System.LinkTypes.Related", 2, 4)
+    graph.link(None, None, 1)
+    assert graph.children == {1: [2], 2: [3]}, graph.children
+    assert graph.parent(2).title == "Epic" and graph.parent(3).id == 2
+    assert graph.parent(1) is None
+    assert graph.roots() == [1]
+    assert [i.id for i in graph.descendants(1)] == [2]
+    assert 2 in graph and 3 not in graph and len(graph) == 2
+    assert Graph.linked_id(f"{URL}/42") == 42
+    assert Graph.linked_id("https://dev.azure.com/_apis/wit/attachments/4") is None
+    assert Graph.linked_id(f"{URL}/abc") is None
+    assert Graph.linked_id(None) is None
+
+
+def test_get_graph() -> None:
+    """test expanding a hierarchy one level at a time"""
+    mock = MockClient()
+    client = Client(mock)
+    graph = client.get_graph([1, 2])
+    assert len(graph) == 2 + 20 + 200, len(graph)
+    assert len(mock.requests) == 1 + 1 + 1, [len(r) for r in mock.requests]
+    assert [i.id for i in graph.descendants(1)][:12] == [10, *range(100, 110), 11]
+    assert len(graph.descendants(1)) == 110
+    assert graph.parent(205).id == 20 and graph.parent(20).id == 2
+    assert graph.roots() == [0], graph.roots()
+    assert not graph.parents.get(0)
+    mock.requests.clear()
+    client.get_graph([2, 3], graph=graph)
+    assert mock.requests == [[3], list(range(30, 40)), list(range(300, 400))]
+    shallow = client.get_graph([5], levels=1)
+    assert len(shallow) == 11 and len(shallow.descendants(5)) == 10
+
+
+def test_find_links() -> None:
+    """test reading link query results"""
+    mock = MockClient()
+    query = Wiql().from_source("WorkItemLinks").mode("Recursive")
+    graph = Client(mock).find_links(query)
+    assert mock.requests == [[1, 10, 11, 110]], mock.requests
+    assert graph.children == {1: [10, 11], 11: [110]}, graph.children
+    assert graph.items[110].title == "Item 110"
+    assert [i.id for i in graph.descendants(1)] == [10, 11, 110]
+    assert not graph.expanded
+
+
+if __name__ == "__main__":
+    test_find_links()
+    test_get_graph()
+    test_graph()
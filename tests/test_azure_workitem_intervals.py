@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+
+""" Test finding revisions by time """
+
+from random import Random
+
+from azure.devops.v7_1.work_item_tracking.models import WorkItem
+
+from devopsdriver.azdo import AzureObject, Timestamp, Wiql, Equal, In, NotEqual
+from devopsdriver.azdo.workitem.intervals import RevisionIndex
+
+
+START = Timestamp("2024-01-01T00:00:00.25Z").to_microseconds()
+HOUR = 3600 * 1000000
+
+
+def history(wi_id: int, *hours: int) -> list[AzureObject]:
+    """Create the history of a work item changed at hours after START"""
+    return [
+        AzureObject(
+            WorkItem(
+                id=wi_id,
+                rev=rev,
+                fields={
+                    "System.State": f"state {rev}",
+                    "System.ChangedDate": str(
+                        Timestamp.from_microseconds(START + hour * HOUR)
+                    ),
+                },
+            )
+        )
+        for rev, hour in enumerate(hours, start=1)
+    ]
+
+
+def at(hour: float) -> Timestamp:
+    """The time hour hours after START"""
+    return Timestamp.from_microseconds(START + int(hour * HOUR))
+
+
+def test_at() -> None:
+    """test finding the revision of one item"""
+    index = RevisionIndex([history(1, 0, 5, 10), history(2, 3), []])
+    assert len(index) == 4, len(index)
+    assert index.at(1, at(-1)) is None
+    assert index.at(1, at(0)).rev == 1
+    assert index.at(1, at(4.9)).rev == 1
+    assert index.at(1, at(5)).rev == 2
+    assert index.at(1, str(at(100))).rev == 3
+    assert index.at(1, at(7).value).rev == 2
+    assert index.at(2, at(2)) is None
+    assert index.at(2, at(3)).rev == 1
+    assert index.at(3, at(3)) is None
+    assert [r.rev for r in index.history(1)] == [1, 2, 3]
+    assert not index.history(5)
+
+
+def test_overlapping() -> None:
+    """test finding revisions in a time range"""
+    index = RevisionIndex([history(1, 0, 5, 10), history(2, 3, 3, 8)])
+    assert [(r.id, r.rev) for r in index.snapshot(at(4))] == [(1, 1), (2, 2)]
+    assert [(r.id, r.rev) for r in index.overlapping(at(4), at(9))] == [
+        (1, 1),
+        (1, 2),
+        (2, 2),
+        (2, 3),
+    ]
+    assert [(r.id, r.rev) for r in index.overlapping(at(-5), at(0))] == []
+    assert [(r.id, r.rev) for r in index.overlapping(at(-5), at(0.5))] == [(1, 1)]
+    assert [(r.id, r.rev) for r in index.overlapping(at(50), at(51))] == [
+        (1, 3),
+        (2, 3),
+    ]
+    assert not index.overlapping(at(9), at(9))
+    assert not RevisionIndex([]).snapshot(at(1))
+
+
+def test_many() -> None:
+    """test against checking every revision"""
+    generator = Random(13)
+    histories = [
+        history(i, *sorted(generator.sample(range(1000), generator.randint(1, 20))))
+        for i in range(500)
+    ]
+    index = RevisionIndex(histories)
+    changes = [
+        [(r.id, r.rev, r.changeddate) for r in h] + [(None, None, None)]
+        for h in histories
+    ]
+
+    for _ in range(25):
+        start = generator.uniform(-10, 1010)
+        end = start + generator.choice([0.001, 1, 10, 300])
+        expected = [
+            (i, rev)
+            for c in changes
+            for (i, rev, changed), (_, _, after) in zip(c, c[1:])
+            if changed < at(end) and (after is None or after > at(start))
+        ]
+        found = [(r.id, r.rev) for r in index.overlapping(at(start), at(end))]
+        assert found == expected, (start, end)
+        current = [index.at(i, at(start)) for i in range(500)]
+        assert index.snapshot(at(start)) == [r for r in current if r is not None]
+
+
+def test_asof() -> None:
+    """test evaluating a query at points in time"""
+    index = RevisionIndex([history(1, 0, 5, 10), history(2, 3, 3, 8), history(3, 6)])
+    query = Wiql().where(In("State", "state 1", "state 2"))
+    assert [(r.id, r.rev) for r in index.asof(query, at(4))] == [(1, 1), (2, 2)]
+    assert [(r.id, r.rev) for r in index.asof(query, at(9))] == [(1, 2), (3, 1)]
+    assert len(index.asof(Wiql(), at(9))) == 3
+    assert [r.id for r in index.asof(NotEqual("State", "state 3"), at(20))] == [3]
+    burndown = [len(index.asof(Equal("State", "state 1"), at(h))) for h in range(12)]
+    assert burndown == [1, 1, 1, 1, 1, 0, 1, 1, 1, 1, 1, 1], burndown
+
+
+if __name__ == "__main__":
+    test_asof()
+    test_many()
+    test_overlapping()
+    test_at()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+
+""" Test the local revision store """
+
+from os.path import join
+from tempfile import TemporaryDirectory
+from types import SimpleNamespace
+
+from azure.devops.v7_1.work_item_tracking.models import WorkItem
+
+from devopsdriver.azdo.workitem.client import Client
+from devopsdriver.azdo.workitem.store import RevisionStore
+from devopsdriver.azdo import Wiql, Equal
+
+
+def revision(wi_id: int, rev: int) -> WorkItem:
+    """Create a work item revision"""
+    return WorkItem(
+        id=wi_id,
+        rev=rev,
+        fields={
+            "System.Rev": rev,
+            "System.State": "New" if rev == 1 else "Active",
+            "System.ChangedDate": f"2024-01-{rev:02d}T00:00:00.5Z",
+        },
+    )
+
+
+class MockClient:
+    """fake an azure work item client with changing revisions"""
+
+    def __init__(self, revisions: dict[int, int]):
+        self.revisions = revisions
+        self.requests = []
+
+    def query_by_wiql(self, wiql, team_context, time_precision, top) -> SimpleNamespace:
+        """mock out the query_by_wiql"""
+        assert wiql.query and team_context is None and time_precision is None, wiql
+        assert top is None, top
+        return SimpleNamespace(
+            work_items=[SimpleNamespace(id=i) for i in sorted(self.revisions)]
+        )
+
+    def get_work_items_batch(self, work_item_get_request, project):
+        """mock out get_work_items_batch"""
+        assert project is None, project
+        assert work_item_get_request.fields == ["System.Rev"]
+        return [revision(i, self.revisions[i]) for i in work_item_get_request.ids]
+
+    def get_revisions(self, wi_id, project, top, skip, expand):
+        """mock out get_revisions, 2 revisions per page"""
+        assert project is None and top is None and expand is None
+        self.requests.append((wi_id, skip))
+        latest = self.revisions[wi_id]
+        return [revision(wi_id, r) for r in range(skip + 1, min(latest, skip + 2) + 1)]
+
+
+def test_store() -> None:
+    """test storing and retrieving revisions"""
+    with TemporaryDirectory() as directory:
+        with RevisionStore(join(directory, "revisions.sqlite3")) as store:
+            assert store.latest(5) == 0
+            assert not store.history(5)
+            store.add([revision(5, 2), revision(5, 1), revision(6, 1)])
+            assert store.latest(5) == 2
+            assert store.latest(6) == 1
+
+        with RevisionStore(join(directory, "revisions.sqlite3")) as store:
+            history = store.history(5)
+            assert [r.rev for r in history] == [1, 2], history
+            assert history[1].state == "Active", history[1].state
+            assert history[0].ChangedDate.to_string() == "2024-01-01T00:00:00.5Z"
+
+
+def test_sync() -> None:
+    """test only new revisions are fetched"""
+    mock = MockClient({1: 1, 2: 3, 3: 5})
+    client = Client(mock)
+    query = Wiql().where(Equal("State", "Active"))
+
+    with RevisionStore() as store:
+        found = client.sync(query, store)
+        assert [[r.rev for r in h] for h in found] == [[1], [1, 2, 3], [1, 2, 3, 4, 5]]
+        assert sorted(mock.requests) == [(1, 0), (2, 0), (2, 2), (3, 0), (3, 2), (3, 4)]
+
+        mock.requests.clear()
+        found = client.sync(query, store)
+        assert [len(h) for h in found] == [1, 3, 5], found
+        assert not mock.requests, mock.requests
+
+        mock.revisions[2] = 4
+        mock.revisions[4] = 1
+        found = client.sync(query, store)
+        assert [len(h) for h in found] == [1, 4, 5, 1], found
+        assert sorted(mock.requests) == [(2, 3), (4, 0)], mock.requests
+
+        mock.requests.clear()
+        mock.revisions[1] = 2  # an older change than the newest stored revision
+        found = client.sync(query, store)
+        assert [len(h) for h in found] == [2, 4, 5, 1], found
+        assert mock.requests == [(1, 1)], mock.requests
+
+
+if __name__ == "__main__":
+    test_sync()
+    test_store()
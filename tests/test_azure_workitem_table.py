@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+
+""" Test the columnar revision table """
+
+from array import array
+
+from azure.devops.v7_1.work_item_tracking.models import WorkItem
+
+from devopsdriver.azdo import AzureObject, Timestamp
+from devopsdriver.azdo.workitem.table import RevisionTable
+
+
+def history(wi_id: int, *states: str) -> list[AzureObject]:
+    """Create the history of a work item"""
+    return [
+        AzureObject(
+            WorkItem(
+                id=wi_id,
+                rev=rev,
+                fields={
+                    "System.State": state,
+                    "System.ChangedDate": f"2024-02-{rev:02d}T1{wi_id}:00:00.25Z",
+                    "System.AssignedTo": {
+                        "displayName": "John Doe",
+                        "uniqueName": "john@company.com",
+                    },
+                    "Microsoft.VSTS.Common.Priority": wi_id,
+                    "System.ClosedDate": None if state != "Closed" else "nope",
+                },
+            )
+        )
+        for rev, state in enumerate(states, start=1)
+    ]
+
+
+HISTORIES = [history(1, "New", "Active", "Closed"), history(2, "New", "Active")]
+
+
+def test_columns() -> None:
+    """test values are stored compactly"""
+    table = RevisionTable.from_histories(HISTORIES)
+    assert len(table) == 5, len(table)
+    assert table.columns["System.Id"] == [1, 1, 1, 2, 2]
+    assert table.columns["System.Rev"] == [1, 2, 3, 1, 2]
+    assert isinstance(table.columns["System.ChangedDate"], array)
+    assert table.columns["System.ChangedDate"][0] == 1706785200250000
+    assert table.column("assignedto")[0] == "John Doe <john@company.com>"
+    assert table.column("assignedto")[0] is table.column("assignedto")[4]
+    assert table.column("ClosedDate") == [None, None, "nope", None, None]
+    assert table.field("system_state") == "System.State"
+    assert table.field("nothing") is None
+    assert not RevisionTable({})
+
+
+def test_rows() -> None:
+    """test row access"""
+    table = RevisionTable.from_histories(
+        HISTORIES, ["System.State", "System.ChangedDate"]
+    )
+    assert set(table.columns) == {
+        "System.Id",
+        "System.Rev",
+        "System.State",
+        "System.ChangedDate",
+    }
+    row = table[-1]
+    assert row.id == 2 and row.rev == 2 and row.state == "Active", row
+    assert row.changeddate == Timestamp("2024-02-02T12:00:00.25Z"), row.changeddate
+    assert row.priority is None
+    assert [r.state for r in table] == ["New", "Active", "Closed", "New", "Active"]
+    table = RevisionTable.from_histories(HISTORIES, ["System.ChangedDate"])
+    table.columns["System.ChangedDate"][1] = -(2**63)
+    assert table[1].ChangedDate is None
+
+
+def test_filter_and_group() -> None:
+    """test filtering and grouping"""
+    table = RevisionTable.from_histories(HISTORIES)
+    active = table.filter("state", lambda s: s == "Active")
+    assert active.column("id") == [1, 2], active.column("id")
+    late = table.filter(
+        "ChangedDate", lambda c: c > Timestamp("2024-02-02T00:00:00.0Z")
+    )
+    assert late.column("rev") == [2, 3, 2], late.column("rev")
+    assert isinstance(late.columns["System.ChangedDate"], array)
+    items = table.group_by("Id")
+    assert list(items) == [1, 2], items
+    assert items[1].column("state") == ["New", "Active", "Closed"]
+    changed = table.group_by("ChangedDate")
+    assert len(changed) == 5 and all(isinstance(c, Timestamp) for c in changed)
+
+    for call in (
+        lambda: table.column("nothing"),
+        lambda: table.filter("nothing", bool),
+        lambda: table.group_by("nothing"),
+    ):
+        try:
+            call()
+            raise AssertionError("missing fields should raise KeyError")
+
+        except KeyError as error:
+            assert error.args == ("nothing",), error
+
+
+if __name__ == "__main__":
+    test_filter_and_group()
+    test_rows()
+    test_columns()
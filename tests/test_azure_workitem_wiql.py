@@ -2,9 +2,13 @@
 
 """Test work item query language"""
 
-from datetime import date, datetime
+from datetime import date, datetime, timezone
 
-from devopsdriver.azdo import Wiql
+from azure.devops.v7_1.work_item_tracking.models import WorkItem
+
+from devopsdriver.azdo import AzureObject, Wiql, Group
+from devopsdriver.azdo.workitem.table import RevisionTable
+from devopsdriver.azdo.workitem.wiql import Compare
 from devopsdriver.azdo import Ascending, Descending, Value
 from devopsdriver.azdo import IsEmpty, IsNotEmpty, And, Or, In, NotIn
 from devopsdriver.azdo import GreaterThan, LessThan, Equal, NotEqual
@@ -78,7 +82,157 @@ def test_in_and_not_in() -> None:
     assert str(builder) == expected, str(builder)
 
 
+def test_matches() -> None:
+    """Test evaluating expressions against work items"""
+    item = AzureObject(
+        WorkItem(
+            id=5,
+            rev=3,
+            fields={
+                "System.Id": 5,
+                "System.State": "Active",
+                "System.Title": "",
+                "System.CreatedDate": "2024-06-30T18:30:15.25Z",
+                "System.AssignedTo": {
+                    "displayName": "John Doe",
+                    "uniqueName": "john@company.com",
+                },
+                "Microsoft.VSTS.Common.Priority": 2,
+                "Custom.Rank": 5.5,
+            },
+        )
+    )
+    assert Equal("State", "active").matches(item)
+    assert not NotEqual("State", "Active").matches(item)
+    assert NotEqual("RootCause", "Bug").matches(item)
+    assert not Equal("RootCause", "Bug").matches(item)
+    assert IsEmpty("Title").matches(item) and IsEmpty("RootCause").matches(item)
+    assert IsNotEmpty("Priority").matches(item)
+    assert GreaterThan("Priority", 1).matches(item)
+    assert LessThanOrEqual("Priority", 2).matches(item)
+    assert Equal("Priority", "2").matches(item)
+    assert not NotEqual("Priority", "2").matches(item)
+    assert LessThan("Priority", "2.5").matches(item)
+    assert GreaterThanOrEqual("Custom.Rank", 5.5).matches(item)
+    assert Equal("CreatedDate", date(2024, 6, 30)).matches(item)
+    assert not GreaterThan("CreatedDate", date(2024, 6, 30)).matches(item)
+    assert LessThan(
+        "CreatedDate", datetime(2024, 6, 30, 19, tzinfo=timezone.utc)
+    ).matches(item)
+    assert GreaterThan("CreatedDate", "2024-06-30T18:30:15.1Z").matches(item)
+    assert GreaterThanOrEqual("CreatedDate", "2024-06-30").matches(item)
+    assert not LessThan("CreatedDate", "2024-06-30").matches(item)
+    assert Equal("CreatedDate", "06/30/2024").matches(item)
+    assert LessThan("CreatedDate", "2024-06-30T19:00:00+00:00").matches(item)
+    assert Equal("AssignedTo", "john doe").matches(item)
+    assert Equal("AssignedTo", "john@company.com").matches(item)
+    assert Equal("AssignedTo", "John Doe <john@company.com>").matches(item)
+    assert In("State", "New", "Active").matches(item)
+    assert not In("Priority", 1, 3).matches(item)
+    assert NotIn("Priority", 1, 3).matches(item)
+    assert not NotIn("State", "New", Value("active")).matches(item)
+    assert And(Equal("State", "Active"), Or(Equal("Id", 4), Equal("Id", 5))).matches(
+        item
+    )
+    assert not Group(And(Equal("State", "Active"), Equal("Id", 4))).matches(item)
+
+    for mismatch in (
+        GreaterThan("Priority", "@Today"),
+        Equal("Priority", "high"),
+        LessThan("CreatedDate", "yesterday"),
+        GreaterThan("State", 5),
+    ):
+        try:
+            mismatch.matches(item)
+            assert False, f"ValueError not raised for {mismatch}"
+
+        except ValueError:
+            pass
+
+    try:
+        today = Compare("ChangedDate", "@Today", "<", value_is_computed=True)
+        today.matches(item)
+        assert False, "ValueError not raised"
+
+    except ValueError as error:
+        assert "@Today" in str(error), error
+
+
+def work_item(wi_id: int, state: str, priority: int | None) -> AzureObject:
+    """Create a work item"""
+    return AzureObject(
+        WorkItem(
+            id=wi_id,
+            rev=1,
+            fields={
+                "System.Id": wi_id,
+                "System.State": state,
+                "System.Title": f"Item {wi_id}",
+                "Microsoft.VSTS.Common.Priority": priority,
+            },
+        )
+    )
+
+
+def test_evaluate() -> None:
+    """Test running a query against downloaded work items"""
+    items = [
+        work_item(1, "New", 2),
+        work_item(2, "active", 1),
+        work_item(3, "Active", None),
+        work_item(4, "Closed", 1),
+        work_item(5, "New", 1),
+    ]
+    query = (
+        Wiql()
+        .where(NotEqual("State", "Closed"))
+        .order_by(Ascending("Priority"), Descending("Id"))
+    )
+    assert [i.id for i in query.evaluate(items)] == [3, 5, 2, 1]
+    assert query.evaluate(items)[0] is items[2]
+    query = query.select("Id", "State").order_by(Descending("State"), Ascending("Id"))
+    found = query.evaluate(items)
+    assert [i.id for i in found] == [1, 5, 2, 3], [i.id for i in found]
+    assert found[0].state == "New" and found[0].title is None
+    assert not Wiql().where(Equal("State", "Resolved")).evaluate(items)
+    assert len(Wiql().evaluate(items)) == 5
+
+    table = RevisionTable.from_histories([[i] for i in items])
+    found = query.evaluate(table)
+    assert found.columns["System.Id"] == [1, 5, 2, 3]
+    assert set(found.columns) == {"System.Id", "System.Rev", "System.State"}
+    found = Wiql().where(Equal("Priority", 1)).evaluate(table)
+    assert found.columns["System.Id"] == [2, 4, 5]
+    assert found.column("title") == ["Item 2", "Item 4", "Item 5"]
+
+
+def test_immutable() -> None:
+    """Test builder methods return new queries"""
+    template = Wiql().select("State").where(In("State", "New", "Active"))
+    teams = [
+        template.where(And(Group(template.search), Equal("Team", t))) for t in "ab"
+    ]
+    assert str(template) == (
+        'SELECT [System.State] FROM WorkItems WHERE [System.State] IN ("New", "Active")'
+    ), str(template)
+    assert str(teams[1]).endswith('AND [Team] = "b"'), str(teams[1])
+    assert str(template) is str(template)
+    assert template.order_by(Ascending("Id")) != template
+    assert not template.order
+    assert template.select("State") == template
+    assert hash(template.select("State")) == hash(template)
+    assert len({template, template.select("State"), teams[0], teams[1]}) == 3
+    assert {template: 5}[Wiql().select("State").where(template.search)] == 5
+    assert template.from_source("WorkItemLinks").mode("MustContain") != template
+    assert template.asof(date(2024, 6, 30)).snapshot.value == date(2024, 6, 30)
+    assert template.snapshot is None
+    assert [v.value for v in template.search.values] == ["New", "Active"]
+
+
 if __name__ == "__main__":
+    test_immutable()
+    test_evaluate()
+    test_matches()
     test_in_and_not_in()
     test_invalid_value_type()
     test_expressions()
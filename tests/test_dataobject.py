@@ -25,5 +25,36 @@ def test_dataobject_basic() -> None:
     assert data.fields.people[2] == "test", data.fields.people[2]
 
 
+def test_dataobject_index() -> None:
+    """tests field names are indexed once per dict"""
+    built = []
+    original = DataObject._index
+    DataObject._index = staticmethod(lambda d: built.append(d) or original(d))
+    data = DataObject(
+        {
+            "System.State": "New",
+            "Custom.State": "Old",
+            "System.Title": "test",
+            "fields": {"System.Id": 5},
+        }
+    )
+
+    for _ in range(1000):
+        assert data.title == "test", data.title
+        assert data.system_state == "New", data.system_state
+        assert data.FIELDS.ID == 5, data.fields.id
+
+    assert len(built) == 2, built
+    DataObject._index = original
+
+    try:
+        assert data.state is None, data.state
+        raise RuntimeError("state should be ambiguous")
+
+    except AssertionError as error:
+        assert "System.State" in str(error) and "Custom.State" in str(error), error
+
+
 if __name__ == "__main__":
+    test_dataobject_index()
     test_dataobject_basic()